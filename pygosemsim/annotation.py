@@ -1,15 +1,87 @@
 
 import gzip
 from pathlib import Path
+import sys
 
 
 resource_dir = Path(__file__).resolve().parent / "_resources"
 
 
-def from_gaf_lines(lines, qualified_only=True):
+class Record(object):
+    """Base class of compact records that have fixed fields (__slots__)
+    and support read-only dict-style access (ex. gene["annotation"],
+    "annotation" in gene, gene.get("db_object_name"), gene.items())
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def get(self, key, default=None):
+        if key not in self.__slots__:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        return self.__slots__
+
+    def values(self):
+        return [getattr(self, k) for k in self.__slots__]
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.__slots__]
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+
+class Gene(Record):
+    __slots__ = ("db_object_id", "db_object_symbol", "db_object_name",
+                 "db_object_type", "annotation")
+
+    def __init__(self, db_object_id, db_object_symbol, db_object_name,
+                 db_object_type):
+        self.db_object_id = db_object_id
+        self.db_object_symbol = db_object_symbol
+        self.db_object_name = db_object_name
+        self.db_object_type = sys.intern(db_object_type)
+        self.annotation = {}
+
+
+class Annotation(Record):
+    __slots__ = ("go_id", "qualifier", "evidence_code")
+
+    def __init__(self, go_id, qualifier, evidence_code):
+        self.go_id = sys.intern(go_id)
+        self.qualifier = qualifier
+        self.evidence_code = sys.intern(evidence_code)
+
+
+def from_gaf_lines(lines, qualified_only=True, compact=False):
     """Read gene association entries
     Reference:
         http://www.geneontology.org/page/go-annotation-file-gaf-format-21
+
+    Args:
+        lines(iterable): GAF format lines
+        qualified_only(bool): skip annotations with NOT qualifier
+        compact(bool): if True, gene and annotation entries are stored as
+            Gene and Annotation records (__slots__ objects with interned
+            strings) instead of dicts to reduce memory usage.
+            The records support read-only dict-style access, and
+            "qualifier" is a tuple shared among records (a list in the
+            default mode).
     """
     lines_iter = iter(lines)
 
@@ -18,6 +90,7 @@ def from_gaf_lines(lines, qualified_only=True):
     format_ver = fv_line.split(":")[1].strip()
     print(f"gaf-version: {format_ver}")
     annots = {}
+    qualifier_cache = {}  # Qualifier tuples shared by compact records
     # Records
     for line in lines_iter:
         if line.startswith("!"):
@@ -25,24 +98,33 @@ def from_gaf_lines(lines, qualified_only=True):
         row = line.split("\t")
         uid = row[1]  # DB Object ID (= UniProt ID)
         if uid not in annots:
-            annots[uid] = {
-                "db_object_id": uid,
-                "db_object_symbol": row[2],
-                "db_object_name": row[9],
-                "db_object_type": row[11],
-                "annotation": {}
-            }
+            if compact:
+                annots[uid] = Gene(uid, row[2], row[9], row[11])
+            else:
+                annots[uid] = {
+                    "db_object_id": uid,
+                    "db_object_symbol": row[2],
+                    "db_object_name": row[9],
+                    "db_object_type": row[11],
+                    "annotation": {}
+                }
         qualifiers = row[3].split("|")
         if qualified_only:
             if "NOT" in qualifiers:
                 continue
         # Add GO annotation
         go_id = row[4]
-        annots[uid]["annotation"][go_id] = {
-            "go_id": go_id,
-            "qualifier": qualifiers,
-            "evidence_code": row[6],
-        }
+        if compact:
+            if row[3] not in qualifier_cache:
+                qualifier_cache[row[3]] = tuple(qualifiers)
+            rec = Annotation(go_id, qualifier_cache[row[3]], row[6])
+            annots[uid].annotation[rec.go_id] = rec
+        else:
+            annots[uid]["annotation"][go_id] = {
+                "go_id": go_id,
+                "qualifier": qualifiers,
+                "evidence_code": row[6],
+            }
     return annots
 
 
@@ -0,0 +1,411 @@
+
+import numpy as np
+
+from pygosemsim import exception, obo
+
+
+# Traversal policies (name -> relation types to be traversed, None: all)
+POLICIES = {
+    "is_a": ("is_a",),
+    "is_a+part_of": ("is_a", "part_of"),
+    "all": None
+}
+
+
+def concat_ranges(starts, lens):
+    """Concatenated index ranges [starts[i], starts[i] + lens[i]),
+    ex. positions of the CSR rows in the indices array
+
+    Returns:
+        numpy.ndarray - indices of total length lens.sum()
+    """
+    return np.repeat(starts - np.cumsum(lens) + lens, lens) \
+        + np.arange(lens.sum())
+
+
+def resolve_policy(policy):
+    """Resolve traversal policy into the set of relation types
+
+    Args:
+        policy: policy name in `POLICIES`, iterable of relation types
+            or None (all relation types)
+
+    Returns:
+        frozenset - relation types or None (all relation types)
+    """
+    if policy is None:
+        return
+    if isinstance(policy, str):
+        try:
+            policy = POLICIES[policy]
+        except KeyError:
+            raise ValueError(f"Unknown policy: {policy}")
+        if policy is None:
+            return
+    return frozenset(policy)
+
+
+class CompiledGraph(object):
+    """Array-backed ontology DAG for IC and similarity calculation of
+    large ontologies (ex. ChEBI, HPO) without building networkx graph
+
+    Parent edges are stored in CSR (compressed sparse row) layout, that is,
+    parents of terms[i] are parent_indices[parent_indptr[i]:parent_indptr[i+1]]
+    and their relation types are coded in parent_types.
+
+    Attributes:
+        terms(list): term IDs (index -> term ID)
+        term_index(dict): term ID -> index
+        alt_ids(dict): alternative IDs dictionary
+        relations(list): relation types (code -> relation type)
+        parent_indptr(numpy.ndarray): row pointers (len(terms) + 1)
+        parent_indices(numpy.ndarray): parent term indices
+        parent_types(numpy.ndarray): relation type codes of the edges
+        closures(dict): cached Closure of each traversal policy
+    """
+    def __init__(self, terms, alt_ids, relations,
+                 parent_indptr, parent_indices, parent_types):
+        self.terms = terms
+        self.term_index = {t: i for i, t in enumerate(terms)}
+        self.alt_ids = alt_ids
+        self.relations = relations
+        self.parent_indptr = parent_indptr
+        self.parent_indices = parent_indices
+        self.parent_types = parent_types
+        self.closures = {}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def index(self, term):
+        """Returns the index of the term (alternative IDs are resolved)
+
+        Raises:
+            PGSSLookupError: The term was not found in the graph
+        """
+        term = self.alt_ids.get(term, term)
+        try:
+            return self.term_index[term]
+        except KeyError:
+            raise exception.PGSSLookupError(f"Missing term: {term}")
+
+    def closure(self, policy="all"):
+        """Ancestor closure and information content of the traversal policy.
+        The closure is calculated from the edge arrays on the first call
+        and cached, so switching policies does not rescan the graph.
+
+        Args:
+            policy: policy name in `POLICIES` (ex. "is_a") or
+                iterable of relation types to be traversed
+
+        Returns:
+            Closure - the closure
+        """
+        relations = resolve_policy(policy)
+        if relations not in self.closures:
+            self.closures[relations] = Closure(self, relations)
+        return self.closures[relations]
+
+
+def from_edges(terms, edges, alt_ids=None):
+    """Build CompiledGraph
+
+    Args:
+        terms(iterable): term IDs
+        edges(iterable): (parent, child, relation type) tuples
+            (terms that only appear in edges are also added)
+        alt_ids(dict): alternative IDs dictionary
+
+    Returns:
+        CompiledGraph - the graph
+    """
+    terms = list(terms)
+    term_index = {t: i for i, t in enumerate(terms)}
+    relations = []
+    rel_index = {}
+    parents = []
+    children = []
+    types = []
+    for parent, child, type_ in edges:
+        for t in (parent, child):
+            if t not in term_index:
+                term_index[t] = len(terms)
+                terms.append(t)
+        if type_ not in rel_index:
+            rel_index[type_] = len(relations)
+            relations.append(type_)
+        parents.append(term_index[parent])
+        children.append(term_index[child])
+        types.append(rel_index[type_])
+    children = np.array(children, dtype=np.int64)
+    order = np.argsort(children, kind="stable")
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(children, minlength=len(terms)), out=indptr[1:])
+    return CompiledGraph(
+        terms, dict(alt_ids or {}), relations, indptr,
+        np.array(parents, dtype=np.int64)[order],
+        np.array(types, dtype=np.int16)[order])
+
+
+def from_graph(G):
+    """Build CompiledGraph from GoGraph (edges without "type" attribute
+    are regarded as is_a)
+    """
+    edges = ((u, v, e.get("type", "is_a")) for u, v, e in G.edges(data=True))
+    return from_edges(G.nodes, edges, G.alt_ids)
+
+
+def from_obo_lines(lines, ignore_obsolete=True, relations=None):
+    """Build CompiledGraph from OBO format lines of arbitrary ontology
+
+    Args:
+        lines(iterable): OBO format lines
+        ignore_obsolete(bool): skip obsolete terms
+        relations(iterable): relation types to be loaded as edges
+            (default: None, all relation types)
+
+    Returns:
+        CompiledGraph - the graph
+    """
+    terms = []
+    edges = []
+    alt_ids = {}
+    for term in obo.terms_iter(lines, ignore_obsolete, relations):
+        terms.append(term["id"])
+        for alt_id in term["alt_id"]:
+            alt_ids[alt_id] = term["id"]
+        for rel in term["relationship"]:
+            edges.append((rel["id"], term["id"], rel["type"]))
+    return from_edges(terms, edges, alt_ids)
+
+
+def from_obo(pathlike, **kwargs):
+    with open(pathlike, "rt") as f:
+        CG = from_obo_lines(f, **kwargs)
+    return CG
+
+
+def closure(G, policy="all"):
+    """Closure of GoGraph of the traversal policy. CompiledGraph is built
+    on the first call and cached as `GoGraph.compiled` with the closures.
+    The cache is rebuilt if the number of nodes was changed (call
+    `GoGraph.clear_compiled` after other modification of the graph)
+
+    If the graph is a part of the ontology (`GoGraph.partial`, ex. subgraph
+    of a snapshot), information content is calculated from the lower bounds
+    counted on the whole ontology (`GoGraph.lower_bounds` or
+    `GoGraph.policy_lower_bounds`)
+
+    Args:
+        G(GoGraph): GoGraph object
+        policy: see `pygosemsim.compiled.CompiledGraph.closure`
+
+    Returns:
+        Closure - the closure
+
+    Raises:
+        PGSSInvalidOperation: The graph is a part of the ontology and
+            lower bounds of the policy on the whole ontology are not given
+        PGSSLookupError: The graph is a part of the ontology and the lower
+            bounds of the term were not found
+    """
+    if G.compiled is None or len(G.compiled) != len(G):
+        G.compiled = from_graph(G)
+    CG = G.compiled
+    relations = resolve_policy(policy)
+    if relations not in CG.closures and G.partial:
+        policy_lbs = G.policy_lower_bounds or {}
+        if relations in policy_lbs:
+            lbs = policy_lbs[relations]
+        elif relations is None and \
+                "Pre-calculated lower bounds" in G.descriptors:
+            lbs = G.lower_bounds
+        else:
+            raise exception.PGSSInvalidOperation(
+                "Lower bounds of the whole ontology are required for the "
+                f"policy '{policy}' on the partial graph")
+        for t in CG.terms:
+            if t not in lbs:
+                raise exception.PGSSLookupError(
+                    f"Missing lower bounds of the term: {t}")
+        CG.closures[relations] = Closure(
+            CG, relations, [lbs[t] for t in CG.terms], G.corpus_size)
+    return CG.closure(relations)
+
+
+class Closure(object):
+    """Ancestor closure of CompiledGraph along the given relation types,
+    with information content based on the number of lower bounds
+    (descendants + 1; see `pygosemsim.similarity.precalc_lower_bounds`)
+
+    Ancestors of terms[i] (including itself) are
+    indices[indptr[i]:indptr[i+1]].
+
+    Attributes:
+        graph(CompiledGraph): the graph
+        relations(frozenset): traversed relation types (None: all)
+        indptr(numpy.ndarray): row pointers (len(graph) + 1)
+        indices(numpy.ndarray): ancestor term indices
+        lower_bounds(numpy.ndarray): number of lower bounds of each term
+        corpus_size(int): number of terms the lower bounds were counted on
+        ic(numpy.ndarray): information content of each term
+    """
+    def __init__(self, CG, relations=None, lower_bounds=None,
+                 corpus_size=None):
+        self.graph = CG
+        self.relations = None if relations is None else frozenset(relations)
+        n = len(CG)
+        src = np.repeat(np.arange(n), np.diff(CG.parent_indptr))
+        dest = CG.parent_indices
+        if self.relations is not None:
+            codes = [i for i, r in enumerate(CG.relations)
+                     if r in self.relations]
+            mask = np.isin(CG.parent_types, codes)
+            src = src[mask]
+            dest = dest[mask]
+        # Topological sort (Kahn's algorithm) from the roots
+        parents = [[] for _ in range(n)]
+        children = [[] for _ in range(n)]
+        for c, p in zip(src.tolist(), dest.tolist()):
+            parents[c].append(p)
+            children[p].append(c)
+        indegree = [len(ps) for ps in parents]
+        stack = [i for i in range(n) if not indegree[i]]
+        ancestors = [None] * n
+        while stack:
+            i = stack.pop()
+            ps = parents[i]
+            if not ps:
+                ancestors[i] = np.array([i], dtype=np.int64)
+            elif len(ps) == 1:
+                ancestors[i] = np.append(ancestors[ps[0]], i)
+            else:
+                ancestors[i] = np.unique(np.concatenate(
+                    [ancestors[p] for p in ps] + [[i]]))
+            for c in children[i]:
+                indegree[c] -= 1
+                if not indegree[c]:
+                    stack.append(c)
+        if any(a is None for a in ancestors):
+            raise exception.PGSSInvalidOperation("The graph has cycles")
+        lens = np.array([len(a) for a in ancestors], dtype=np.int64)
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(lens, out=self.indptr[1:])
+        self.indices = np.concatenate(ancestors)
+        if lower_bounds is None:
+            self.lower_bounds = np.bincount(self.indices, minlength=n)
+        else:
+            # Counted on the whole ontology (the graph is a part of it)
+            self.lower_bounds = np.array(lower_bounds, dtype=np.int64)
+        self.corpus_size = n if corpus_size is None else corpus_size
+        self.ic = -1 * np.log2(self.lower_bounds / self.corpus_size)
+
+    def ancestors(self, term):
+        """Returns the set of ancestor terms (not including the term)
+        """
+        i = self.graph.index(term)
+        rows = self.indices[self.indptr[i]:self.indptr[i + 1]]
+        return {self.graph.terms[a] for a in rows if a != i}
+
+    def information_content(self, term):
+        return float(self.ic[self.graph.index(term)])
+
+    def lowest_common_ancestor(self, term1, term2):
+        """Lowest common ancestor (LCA) that has the lowest number of lower
+        bounds (the most informative common ancestor)
+
+        Returns:
+            str - Lowest common ancestor term
+            or None if the terms have no common ancestors
+
+        Raises:
+            PGSSLookupError: The term was not found in the graph
+        """
+        i = self.graph.index(term1)
+        j = self.graph.index(term2)
+        common = np.intersect1d(
+            self.indices[self.indptr[i]:self.indptr[i + 1]],
+            self.indices[self.indptr[j]:self.indptr[j + 1]],
+            assume_unique=True)
+        if not len(common):
+            return
+        return self.graph.terms[common[np.argmin(self.lower_bounds[common])]]
+
+    def _mica_ic(self, i, cols):
+        """IC of the most informative common ancestors of the term i and
+        each of the terms cols (NaN if no common ancestors)
+        """
+        mask = np.zeros(len(self.graph), dtype=bool)
+        mask[self.indices[self.indptr[i]:self.indptr[i + 1]]] = True
+        starts = self.indptr[cols]
+        lens = self.indptr[cols + 1] - starts
+        anc = self.indices[concat_ranges(starts, lens)]
+        vals = np.where(mask[anc], self.ic[anc], np.nan)
+        offsets = np.zeros(len(cols), dtype=np.int64)
+        np.cumsum(lens[:-1], out=offsets[1:])
+        return np.fmax.reduceat(vals, offsets)
+
+    def pairwise(self, terms1, terms2, method="resnik"):
+        """Batch calculation of semantic similarity between two term lists
+
+        Args:
+            terms1(list): term IDs
+            terms2(list): term IDs
+            method(str): "resnik", "norm_resnik" or "lin"
+
+        Returns:
+            numpy.ndarray - (len(terms1), len(terms2)) float64 array
+            NaN for the pairs that have no common ancestors
+            (or both terms are the root in the case of Lin)
+
+        Raises:
+            PGSSLookupError: The term was not found in the graph
+        """
+        rows = np.array([self.graph.index(t) for t in terms1], dtype=np.int64)
+        cols = np.array([self.graph.index(t) for t in terms2], dtype=np.int64)
+        return self.pairwise_indices(rows, cols, method)
+
+    def pairwise_indices(self, rows, cols, method="resnik"):
+        """Same as `pairwise` but the terms are given as index arrays
+        (see `CompiledGraph.index`)
+        """
+        res = np.full((len(rows), len(cols)), np.nan)
+        if not len(cols):
+            return res
+        for r, i in enumerate(rows):
+            res[r] = self._mica_ic(i, cols)
+        if method == "resnik":
+            return res
+        if method == "norm_resnik":
+            return res / -np.log2(1 / self.corpus_size)
+        if method == "lin":
+            ic_sum = self.ic[rows][:, None] + self.ic[cols][None, :]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                res = 2 * res / ic_sum
+            res[ic_sum == 0] = np.nan
+            return res
+        raise ValueError(f"Unsupported method: {method}")
+
+    def one_vs_all(self, term, method="resnik"):
+        """Similarity between the term and all terms in the graph
+
+        Returns:
+            numpy.ndarray - similarity array ordered by `CompiledGraph.terms`
+        """
+        rows = np.array([self.graph.index(term)], dtype=np.int64)
+        cols = np.arange(len(self.graph), dtype=np.int64)
+        return self.pairwise_indices(rows, cols, method)[0]
+
+    def resnik(self, term1, term2):
+        return self._scalar(term1, term2, "resnik")
+
+    def norm_resnik(self, term1, term2):
+        return self._scalar(term1, term2, "norm_resnik")
+
+    def lin(self, term1, term2):
+        return self._scalar(term1, term2, "lin")
+
+    def _scalar(self, term1, term2, method):
+        sim = self.pairwise([term1], [term2], method)[0, 0]
+        if not np.isnan(sim):
+            return float(sim)
@@ -0,0 +1,328 @@
+
+import functools
+
+import numpy as np
+
+from pygosemsim import compiled, exception
+
+
+class AnnotationIndex(object):
+    """Gene annotations propagated to all ancestor terms (true path rule),
+    stored in CSR (compressed sparse row) layout.
+
+    Row i holds the sorted column indices of the terms annotated to
+    genes[i] and all of their ancestors. The terms directly annotated
+    (before propagation) are also kept in the same layout.
+
+    Attributes:
+        genes(list): gene IDs (row labels)
+        terms(list): GO terms (column labels)
+        gene_index(dict): gene ID -> row index
+        term_index(dict): GO term -> column index
+        indptr(numpy.ndarray): row pointers (len(genes) + 1)
+        indices(numpy.ndarray): column indices of propagated terms
+        annot_indptr(numpy.ndarray): row pointers of direct annotations
+        annot_indices(numpy.ndarray): column indices of direct annotations
+    """
+    def __init__(self, genes, terms, indptr, indices,
+                 annot_indptr, annot_indices):
+        self.genes = genes
+        self.terms = terms
+        self.gene_index = {g: i for i, g in enumerate(genes)}
+        self.term_index = {t: i for i, t in enumerate(terms)}
+        self.indptr = indptr
+        self.indices = indices
+        self.annot_indptr = annot_indptr
+        self.annot_indices = annot_indices
+
+    def __len__(self):
+        return len(self.genes)
+
+    def closure(self, gene):
+        """Returns the set of propagated terms of the gene
+        """
+        i = self.gene_index[gene]
+        cols = self.indices[self.indptr[i]:self.indptr[i + 1]]
+        return {self.terms[c] for c in cols}
+
+    def annotation(self, gene):
+        """Returns the set of directly annotated terms of the gene
+        """
+        i = self.gene_index[gene]
+        cols = self.annot_indices[
+            self.annot_indptr[i]:self.annot_indptr[i + 1]]
+        return {self.terms[c] for c in cols}
+
+    def term_counts(self):
+        """Returns the number of genes annotated to each term (column)
+        """
+        return np.bincount(self.indices, minlength=len(self.terms))
+
+    def information_content(self):
+        """Annotation-based information content of each term (column)
+
+        Returns:
+            numpy.ndarray - -log2(annotated genes / total genes), where
+            genes without any valid annotation (empty rows, ex. all
+            annotations filtered out by evidence codes) are not counted
+        """
+        total = np.count_nonzero(np.diff(self.indptr))
+        freq = self.term_counts() / total
+        return -1 * np.log2(freq)
+
+
+def build_index(G, annots, evidence_codes=None, exclude_evidence=None,
+                policy=None):
+    """Build AnnotationIndex by propagating gene annotations to ancestors
+
+    Args:
+        G(GoGraph): GoGraph object
+        annots(dict): gene annotations (see `pygosemsim.annotation`)
+        evidence_codes(iterable): if given, only annotations with these
+            evidence codes are used
+        exclude_evidence(iterable): annotations with these evidence codes
+            are ignored (ex. ["IEA"])
+        policy: traversal policy used for propagation (ex. "is_a", see
+            `pygosemsim.compiled.POLICIES`; default: all relation types)
+
+    Returns:
+        AnnotationIndex - genes without any valid annotation have empty rows
+    """
+    if policy is None:
+        import networkx as nx
+        ancestors_of = functools.partial(nx.ancestors, G)
+    else:
+        ancestors_of = compiled.closure(G, policy).ancestors
+    include = None if evidence_codes is None else set(evidence_codes)
+    exclude = set(exclude_evidence or [])
+    ancestors = {}  # GO term -> propagated terms cache
+    genes = []
+    terms = []
+    term_index = {}
+    indptr = [0]
+    indices = []
+    annot_indptr = [0]
+    annot_indices = []
+    for uid, record in annots.items():
+        direct = set()
+        closure = set()
+        for go_id, annot in record["annotation"].items():
+            code = annot["evidence_code"]
+            if include is not None and code not in include:
+                continue
+            if code in exclude:
+                continue
+            term = G.alt_ids.get(go_id, go_id)
+            if term not in G:
+                continue
+            if term not in ancestors:
+                ancestors[term] = ancestors_of(term) | {term}
+            direct.add(term)
+            closure |= ancestors[term]
+        cols = []
+        for term in closure:
+            if term not in term_index:
+                term_index[term] = len(terms)
+                terms.append(term)
+            cols.append(term_index[term])
+        cols.sort()
+        genes.append(uid)
+        indices.extend(cols)
+        indptr.append(len(indices))
+        annot_indices.extend(sorted(term_index[t] for t in direct))
+        annot_indptr.append(len(annot_indices))
+    return AnnotationIndex(
+        genes, terms, np.array(indptr, dtype=np.int64),
+        np.array(indices, dtype=np.int64),
+        np.array(annot_indptr, dtype=np.int64),
+        np.array(annot_indices, dtype=np.int64))
+
+
+def _weighted_jaccard(index, genes, weights, dense_ratio=1 / 16,
+                      chunk_size=10 ** 7):
+    """Weighted Jaccard index of propagated annotations of all gene pairs
+
+    Intersections are accumulated from the inverted index (genes annotated
+    to each term) of the CSR rows, that is, a sparse matrix product whose
+    cost depends on the number of co-annotated gene pairs rather than
+    genes x terms. Terms shared by more than dense_ratio of the genes
+    (ex. near the root) are multiplied as dense columns instead.
+    Only the result is dense.
+    """
+    if genes is None:
+        rows = np.arange(len(index.genes))
+    else:
+        rows = np.array([index.gene_index[g] for g in genes], dtype=np.int64)
+    n = len(rows)
+    starts = index.indptr[rows]
+    lens = index.indptr[rows + 1] - starts
+    gene = np.repeat(np.arange(n), lens)
+    term = index.indices[compiled.concat_ranges(starts, lens)]
+    total = np.bincount(gene, weights=weights[term], minlength=n)
+    col_lens = np.bincount(term, minlength=len(weights))
+    frequent = col_lens > n * dense_ratio
+    # Dense columns of frequent terms
+    hi = frequent[term]
+    cols, inv = np.unique(term[hi], return_inverse=True)
+    X = np.zeros((n, len(cols)))
+    X[gene[hi], inv] = 1
+    W = weights[cols]
+    # Sparse product of the other terms along the inverted index
+    gene = gene[~hi]
+    term = term[~hi]
+    col_lens[frequent] = 0
+    col_starts = np.cumsum(col_lens) - col_lens
+    inverted = gene[np.argsort(term, kind="stable")]
+    # Each annotation is paired with all genes annotated to the same term
+    pair_starts = col_starts[term]
+    pair_lens = col_lens[term]
+    pair_cum = np.cumsum(pair_lens)
+    offsets = np.searchsorted(gene, np.arange(n + 1))
+    res = np.empty((n, n))
+    # Row blocks are finished one by one (no n x n temporary arrays)
+    block = max(1, chunk_size // max(1, n))
+    for b in range(0, n, block):
+        size = min(n, b + block) - b
+        inter = res[b:b + size]
+        np.matmul(X[b:b + size] * W, X.T, out=inter)
+        lo = offsets[b]
+        end = offsets[b + size]
+        while lo < end:
+            base = pair_cum[lo - 1] if lo else 0
+            stop = np.searchsorted(pair_cum, base + chunk_size, "right")
+            stop = min(end, max(lo + 1, stop))
+            ls = pair_lens[lo:stop]
+            pair = np.repeat((gene[lo:stop] - b) * n, ls) \
+                + inverted[compiled.concat_ranges(pair_starts[lo:stop], ls)]
+            w = np.repeat(weights[term[lo:stop]], ls)
+            inter += np.bincount(pair, w, minlength=size * n).reshape(size, n)
+            lo = stop
+        union = total[b:b + size, None] + total[None, :] - inter
+        with np.errstate(invalid="ignore", divide="ignore"):
+            np.divide(inter, union, out=inter)
+    return res
+
+
+def sim_gic(index, genes=None, ic=None):
+    """Similarity of all gene pairs based on SimGIC method
+    (Graph Information Content; Pesquita et al.)
+
+    Args:
+        index(AnnotationIndex): AnnotationIndex object
+        genes(iterable): gene IDs (default: all genes in the index)
+        ic(numpy.ndarray): information content of each column
+            (default: `AnnotationIndex.information_content`)
+
+    Returns:
+        numpy.ndarray - (len(genes), len(genes)) similarity matrix
+        NaN for pairs whose propagated annotations are both empty
+    """
+    if ic is None:
+        ic = index.information_content()
+    return _weighted_jaccard(index, genes, ic)
+
+
+def sim_ui(index, genes=None):
+    """Similarity of all gene pairs based on SimUI method
+    (Union-Intersection; Gentleman), that is, the Jaccard index of
+    propagated annotations
+
+    Args:
+        index(AnnotationIndex): AnnotationIndex object
+        genes(iterable): gene IDs (default: all genes in the index)
+
+    Returns:
+        numpy.ndarray - (len(genes), len(genes)) similarity matrix
+        NaN for pairs whose propagated annotations are both empty
+    """
+    return _weighted_jaccard(index, genes, np.ones(len(index.terms)))
+
+
+jaccard = sim_ui
+
+
+def one_vs_all(G, index, query, method="lin", aggregate="bma",
+               policy="all"):
+    """Similarity between a query term set and all genes in the index
+
+    Similarity of the query terms against the union of terms directly
+    annotated in the index is calculated only once, and then reduced to
+    each gene along the direct annotation rows of the index.
+    This gives the same results as `pygosemsim.term_set` functions with
+    unrounded similarity of each gene pair.
+
+    Args:
+        G(GoGraph): GoGraph object
+        index(AnnotationIndex): AnnotationIndex object
+        query(iterable): GO terms of the query (ex. annotation of a gene)
+            terms not found in the graph are ignored
+        method(str): term similarity method "resnik", "norm_resnik" or "lin"
+        aggregate(str): "bma" (Best-Match Average), "max" or "avg"
+        policy: traversal policy for term similarity (see
+            `pygosemsim.compiled.POLICIES`)
+
+    Returns:
+        numpy.ndarray - similarity of each gene ordered by index.genes
+        NaN for genes without valid similarity values
+    """
+    cl = compiled.closure(G, policy)
+    rows = []
+    for term in query:
+        try:
+            rows.append(cl.graph.index(term))
+        except exception.PGSSLookupError:
+            continue
+    rows = np.unique(np.array(rows, dtype=np.int64))
+    # Union of corpus terms
+    union, pos = np.unique(index.annot_indices, return_inverse=True)
+    scores = np.full(len(index.genes), np.nan)
+    if not len(rows) or not len(union):
+        return scores
+    cols = np.array([cl.graph.index(index.terms[c]) for c in union],
+                    dtype=np.int64)
+    M = cl.pairwise_indices(rows, cols, method)  # query x union terms
+    valid = ~np.isnan(M)
+    nonempty = np.diff(index.annot_indptr) > 0
+    offsets = index.annot_indptr[:-1][nonempty]
+    with np.errstate(invalid="ignore"):
+        if aggregate == "max":
+            colmax = np.fmax.reduce(M, axis=0)
+            scores[nonempty] = np.fmax.reduceat(colmax[pos], offsets)
+        elif aggregate == "avg":
+            colsum = np.where(valid, M, 0).sum(axis=0)
+            colcnt = valid.sum(axis=0)
+            scores[nonempty] = np.add.reduceat(colsum[pos], offsets) \
+                / np.add.reduceat(colcnt[pos], offsets)
+        elif aggregate == "bma":
+            # Best match of each query term in the gene
+            best = np.fmax.reduceat(M[:, pos], offsets, axis=1)
+            best_valid = ~np.isnan(best)
+            total = np.where(best_valid, best, 0).sum(axis=0)
+            count = best_valid.sum(axis=0)
+            # Best match of each gene term in the query
+            colmax = np.fmax.reduce(M, axis=0)
+            colmax_valid = ~np.isnan(colmax)
+            total += np.add.reduceat(
+                np.where(colmax_valid, colmax, 0)[pos], offsets)
+            count += np.add.reduceat(colmax_valid[pos].astype(int), offsets)
+            scores[nonempty] = total / count
+        else:
+            raise ValueError(f"Unsupported aggregation: {aggregate}")
+    return scores
+
+
+def rank(index, scores):
+    """Rank genes by the similarity scores in descending order
+    (genes with NaN score are excluded)
+
+    Args:
+        index(AnnotationIndex): AnnotationIndex object
+        scores(numpy.ndarray): scores ordered by index.genes
+            (ex. results of `one_vs_all`)
+
+    Returns:
+        tuple(numpy.ndarray, numpy.ndarray) - ranked gene IDs and scores
+    """
+    order = np.argsort(-scores, kind="stable")
+    order = order[~np.isnan(scores[order])]
+    return np.array(index.genes, dtype=object)[order], scores[order]
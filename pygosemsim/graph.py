@@ -1,17 +1,17 @@
 
+from array import array
+from collections import Counter
 from pathlib import Path
-import re
+import pickle
 
 import networkx as nx
 
 from pygosemsim import exception
+from pygosemsim.obo import blocks_iter, parse_block, terms_iter  # noqa: F401
 
 
 resource_dir = Path(__file__).resolve().parent / "_resources"
 
-termdef = re.compile(r"^\[([a-zA-Z_]+?)\]$")
-splitkv = re.compile(r"(^[a-zA-Z_]+): (.+)")
-
 
 class GoGraph(nx.DiGraph):
     """Directed acyclic graph of Gene Ontology
@@ -24,104 +24,151 @@ class GoGraph(nx.DiGraph):
             Pre-calculated lower bound count (Number of descendants + 1).
             Information content calculation requires precalc lower bounds.
             see `pygosemsim.similarity.precalc_lower_bounds`
+        corpus_size(int): Number of terms in the whole ontology that
+            the lower bounds were counted on (may differ from len(G) if
+            the graph is a subgraph loaded from a snapshot)
+        partial(bool): True if the graph is a part of the ontology
+            (subgraph loaded from a snapshot, see `Snapshot.subgraph`)
+        compiled(CompiledGraph): cached array-backed graph and closures
+            for traversal policies (see `pygosemsim.compiled.closure`)
+        terms(TermTable): term attributes of the graph built in compact
+            mode (node attribute dicts are empty in this case)
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.alt_ids = {}  # Alternative IDs
         self.descriptors = set()
         self.lower_bounds = None
+        self.corpus_size = None
+        self.partial = False
+        self.policy_lower_bounds = None
+        self.compiled = None
+        self.terms = None
         # self.reversed = self.reverse(copy=False)
 
+    def clear_compiled(self):
+        """Clear cached closures (should be called after modification)
+        """
+        self.compiled = None
+
     def require(self, desc):
         if desc not in self.descriptors:
             raise exception.PGSSInvalidOperation(
                 "'{}' is required.".format(desc))
 
+    def term_attr(self, term):
+        """Returns attribute dict of the term (name, namespace, is_obsolete)
+        regardless of whether the graph is compact or not
+        """
+        if self.terms is not None and term in self.terms:
+            return self.terms[term].to_dict()
+        return dict(self.nodes[term])
+
 
-def parse_block(lines):
-    """Parse a Term block
+class Term(object):
+    """Term record of TermTable"""
+    __slots__ = ("id", "name", "namespace", "is_obsolete")
+
+    def __init__(self, id_, name, namespace, is_obsolete):
+        self.id = id_
+        self.name = name
+        self.namespace = namespace
+        self.is_obsolete = is_obsolete
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "namespace": self.namespace,
+            "is_obsolete": self.is_obsolete
+        }
+
+
+class TermTable(object):
+    """Array-backed term attributes. Term names are held in one string
+    and namespaces are encoded as integer codes.
+
+    Attributes:
+        index(dict): term ID -> row
+        namespaces(list): namespaces (code -> namespace)
     """
-    term = {
-        "alt_id": [],
-        "relationship": []
-    }
-    for line in lines:
-        m = re.search(splitkv, line)
-        assert m, f"unexpected line: {line}"
-        key = m.group(1)
-        value = m.group(2)
-        if key in ["id", "name", "namespace", "is_obsolete"]:
-            term[key] = value
-        elif key == "alt_id":
-            term["alt_id"].append(value)
-        elif key == "is_a":
-            goid = value.split("!")[0].strip()
-            term["relationship"].append({"type": "is_a", "id": goid})
-        elif key == "relationship":
-            typedef, goid = value.split("!")[0].strip().split(" ")
-            term["relationship"].append({"type": typedef, "id": goid})
-    assert "id" in term, "missing id"
-    assert "name" in term, "missing name"
-    assert "namespace" in term, "missing namespace"
-    return term
-
-
-def blocks_iter(lines):
-    """Iterate Term (and Typedef) blocks
+    __slots__ = ("index", "namespaces", "_names", "_offsets",
+                 "_ns_codes", "_obsolete")
+
+    def __init__(self, ids, names, namespaces, obsolete):
+        self.index = {t: i for i, t in enumerate(ids)}
+        self.namespaces = []
+        ns_index = {}
+        self._ns_codes = array("H")
+        for ns in namespaces:
+            if ns not in ns_index:
+                ns_index[ns] = len(self.namespaces)
+                self.namespaces.append(ns)
+            self._ns_codes.append(ns_index[ns])
+        self._names = "".join(names)
+        self._offsets = array("L", [0])
+        for name in names:
+            self._offsets.append(self._offsets[-1] + len(name))
+        self._obsolete = bytearray(obsolete)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, term):
+        return term in self.index
+
+    def __getitem__(self, term):
+        i = self.index[term]
+        return Term(
+            term, self._names[self._offsets[i]:self._offsets[i + 1]],
+            self.namespaces[self._ns_codes[i]], bool(self._obsolete[i]))
+
+
+def from_obo_lines(lines, ignore_obsolete=True, relations=None,
+                   compact=False):
+    """Build GoGraph from OBO format lines
+
+    Args:
+        lines(iterable): OBO format lines
+        ignore_obsolete(bool): skip obsolete terms
+        relations(iterable): relation types to be loaded as edges
+            (default: None, all relation types)
+        compact(bool): if True, term attributes are stored in
+            `GoGraph.terms` (TermTable) instead of node attribute dicts
+            to reduce memory usage. Savings are limited to term attributes;
+            networkx node and edge dicts (with "type" of each edge) are
+            kept as in the default mode.
+
+    Returns:
+        GoGraph - the graph
     """
-    type_ = None
-    content = []
-    for line in lines:
-        m = re.search(termdef, line)
-        if m:
-            if type_ is not None and content:
-                yield {"type": type_, "content": content[:]}
-            type_ = m.group(1)
-            content.clear()
-        elif line.rstrip():
-            content.append(line.rstrip())
-    if content:
-        yield {"type": type_, "content": content[:]}
-
-
-def from_obo_lines(lines, ignore_obsolete=True):
-    lines_iter = iter(lines)
-
-    # Header
-    fv_line = next(lines_iter)
-    format_ver = fv_line.split(":")[1].strip()
-    print(f"format-version: {format_ver}")
-
-    # Build graph
     G = GoGraph()
     alt_ids = set()
+    records = ([], [], [], [])
 
-    # Term blocks
-    for tb in blocks_iter(lines_iter):
-        if tb["type"] != "Term":
-            assert tb["type"] == "Typedef", f"unexpected type {tb['type']}"
-            continue
-        term = parse_block(tb["content"])
-
-        # Ignore obsolete term
-        obso = term.get("is_obsolete") == "true"
-        if obso and ignore_obsolete:
-            continue
-
+    for term in terms_iter(lines, ignore_obsolete, relations):
         # Alternative ID mapping
         alt_ids |= set(term["alt_id"])
         for alt_id in term["alt_id"]:
             G.alt_ids[alt_id] = term["id"]
 
         # Add node
-        attr = {
-            "name": term["name"],
-            "namespace": term["namespace"],
-            "is_obsolete": obso
-        }
-        G.add_node(term["id"], **attr)
+        if compact:
+            G.add_node(term["id"])
+            for col, key in zip(records, ("id", "name", "namespace",
+                                          "is_obsolete")):
+                col.append(term[key])
+        else:
+            attr = {
+                "name": term["name"],
+                "namespace": term["namespace"],
+                "is_obsolete": term["is_obsolete"]
+            }
+            G.add_node(term["id"], **attr)
         for rel in term["relationship"]:
+            # Relation type strings are interned by parse_block
             G.add_edge(rel["id"], term["id"], type=rel["type"])
+    if compact:
+        G.terms = TermTable(*records)
 
     # Check
     assert not (set(G) & alt_ids), "Inconsistent alternative IDs"
@@ -140,3 +187,128 @@ def from_obo(pathlike, **kwargs):
 def from_resource(name, **kwargs):
     filename = f"{name}.obo"
     return from_obo(resource_dir / filename, **kwargs)
+
+
+class Snapshot(object):
+    """Pre-parsed ontology that builds GoGraph of the requested terms
+    on demand, without parsing the .obo file or building the whole graph.
+
+    Attributes:
+        terms(dict): term ID -> (attribute dict, ((parent ID, type), ...))
+        alt_ids(dict): alternative IDs dictionary
+        lower_bounds(dict): Pre-calculated lower bound count of the whole
+            ontology (or None if the graph was not pre-calculated)
+        corpus_size(int): Number of terms in the whole ontology
+        policy_lower_bounds(dict): lower bound count of the whole ontology
+            of each traversal policy in `pygosemsim.compiled.POLICIES`
+    """
+    def __init__(self, data):
+        self.terms = data["terms"]
+        self.alt_ids = data["alt_ids"]
+        self.lower_bounds = data["lower_bounds"]
+        self.corpus_size = data["corpus_size"]
+        self.policy_lower_bounds = data.get("policy_lower_bounds")
+
+    def subgraph(self, terms=None, G=None):
+        """Build the graph of the given terms and all of their ancestors
+
+        Args:
+            terms(iterable): term IDs (default: all terms)
+            G(GoGraph): if given, missing terms are added to the graph
+                in place
+
+        Returns:
+            GoGraph - the graph
+
+        Raises:
+            PGSSLookupError: The term was not found in the snapshot
+        """
+        if G is None:
+            G = GoGraph()
+            G.alt_ids = self.alt_ids
+            G.corpus_size = self.corpus_size
+            G.policy_lower_bounds = self.policy_lower_bounds
+            if self.lower_bounds is not None:
+                G.lower_bounds = Counter()
+                G.descriptors.add("Pre-calculated lower bounds")
+        if terms is None:
+            terms = self.terms.keys()
+        stack = []
+        for term in terms:
+            term = self.alt_ids.get(term, term)
+            if term not in self.terms:
+                raise exception.PGSSLookupError(f"Missing term: {term}")
+            stack.append(term)
+        # Ancestors of the terms already in G should be also in G
+        new_terms = set()
+        while stack:
+            term = stack.pop()
+            if term in G or term in new_terms:
+                continue
+            new_terms.add(term)
+            stack.extend(p for p, _ in self.terms[term][1])
+        for term in new_terms:
+            G.add_node(term, **self.terms[term][0])
+            if G.lower_bounds is not None:
+                G.lower_bounds[term] = self.lower_bounds[term]
+        for term in new_terms:
+            for parent, type_ in self.terms[term][1]:
+                G.add_edge(parent, term, type=type_)
+        G.partial = len(G) < self.corpus_size
+        G.clear_compiled()
+        return G
+
+
+def to_snapshot(G, pathlike):
+    """Save GoGraph as a snapshot (pre-calculated lower bounds are
+    also saved if available). Lower bounds of each traversal policy are
+    counted and saved so that subgraphs give the same information content
+    as the whole ontology.
+    """
+    from pygosemsim import compiled
+    terms = {}
+    for n in G:
+        rels = tuple(
+            (p, e.get("type", "is_a")) for p, e in G.pred[n].items())
+        terms[n] = (G.term_attr(n), rels)
+    data = {
+        "terms": terms,
+        "alt_ids": G.alt_ids,
+        "lower_bounds": None,
+        "corpus_size": len(G) if G.corpus_size is None else G.corpus_size,
+        "policy_lower_bounds": {}
+    }
+    if "Pre-calculated lower bounds" in G.descriptors:
+        data["lower_bounds"] = dict(G.lower_bounds)
+    if not G.partial:
+        for policy in compiled.POLICIES:
+            cl = compiled.closure(G, policy)
+            data["policy_lower_bounds"][cl.relations] = dict(
+                zip(cl.graph.terms, cl.lower_bounds.tolist()))
+    elif G.policy_lower_bounds is not None:
+        # Subgraph of the ontology
+        data["policy_lower_bounds"] = {
+            rels: {n: lbs[n] for n in G}
+            for rels, lbs in G.policy_lower_bounds.items()}
+    with open(pathlike, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def load_snapshot(pathlike):
+    with open(pathlike, "rb") as f:
+        data = pickle.load(f)
+    return Snapshot(data)
+
+
+def from_snapshot(pathlike, terms=None):
+    """Build GoGraph from the snapshot
+
+    Args:
+        pathlike: snapshot file path
+        terms(iterable): if given, only the terms and their ancestors are
+            loaded (see `pygosemsim.graph.Snapshot.subgraph`)
+
+    Returns:
+        GoGraph - the graph
+    """
+    return load_snapshot(pathlike).subgraph(terms)
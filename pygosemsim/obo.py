@@ -0,0 +1,98 @@
+
+import re
+import sys
+
+
+termdef = re.compile(r"^\[([a-zA-Z_]+?)\]$")
+splitkv = re.compile(r"(^[a-zA-Z_-]+):\s*(.+)")
+
+
+def parse_block(lines):
+    """Parse a Term block
+    """
+    term = {
+        "alt_id": [],
+        "relationship": []
+    }
+    for line in lines:
+        m = re.search(splitkv, line)
+        assert m, f"unexpected line: {line}"
+        key = m.group(1)
+        value = m.group(2)
+        if key == "id":
+            term[key] = sys.intern(value)
+        elif key in ["name", "namespace", "is_obsolete"]:
+            term[key] = value
+        elif key == "alt_id":
+            term["alt_id"].append(value)
+        elif key == "is_a":
+            # Trailing modifiers (ex. {source="..."}) are ignored
+            fields = value.split("!")[0].split()
+            assert fields, f"missing is_a term: {line}"
+            goid = sys.intern(fields[0])
+            term["relationship"].append({"type": "is_a", "id": goid})
+        elif key == "relationship":
+            fields = value.split("!")[0].split()
+            assert len(fields) >= 2, f"invalid relationship: {line}"
+            typedef, goid = map(sys.intern, fields[:2])
+            term["relationship"].append({"type": typedef, "id": goid})
+    assert "id" in term, "missing id"
+    assert "name" in term, "missing name"
+    # namespace is not mandatory for non-GO ontologies
+    term.setdefault("namespace", None)
+    return term
+
+
+def blocks_iter(lines):
+    """Iterate Term (and Typedef) blocks
+    """
+    type_ = None
+    content = []
+    for line in lines:
+        m = re.search(termdef, line)
+        if m:
+            if type_ is not None and content:
+                yield {"type": type_, "content": content[:]}
+            type_ = m.group(1)
+            content.clear()
+        elif line.rstrip():
+            content.append(line.rstrip())
+    if content:
+        yield {"type": type_, "content": content[:]}
+
+
+def terms_iter(lines, ignore_obsolete=True, relations=None):
+    """Iterate parsed Term blocks of OBO format lines (header included)
+
+    Args:
+        lines(iterable): OBO format lines
+        ignore_obsolete(bool): skip obsolete terms
+        relations(iterable): relation types to be loaded (ex. ["is_a"])
+            (default: None, all relation types)
+
+    Yields:
+        dict - parsed term (see `parse_block`) with
+        "is_obsolete" flag converted to bool
+    """
+    lines_iter = iter(lines)
+
+    # Header
+    fv_line = next(lines_iter)
+    format_ver = fv_line.split(":")[1].strip()
+    print(f"format-version: {format_ver}")
+
+    rels = None if relations is None else set(relations)
+    # Term blocks (Typedef, Instance and other stanzas are skipped)
+    for tb in blocks_iter(lines_iter):
+        if tb["type"] != "Term":
+            continue
+        term = parse_block(tb["content"])
+
+        # Ignore obsolete term
+        term["is_obsolete"] = term.get("is_obsolete") == "true"
+        if term["is_obsolete"] and ignore_obsolete:
+            continue
+        if rels is not None:
+            term["relationship"] = [
+                r for r in term["relationship"] if r["type"] in rels]
+        yield term
@@ -1,51 +1,74 @@
 
 from collections import Counter
+import inspect
 import math
 
-import networkx as nx
-
 from pygosemsim import exception
 
 
+def round_value(value, digits):
+    """Round the value for presentation (no rounding if digits is None)
+    """
+    if value is None or digits is None:
+        return value
+    return round(value, digits)
+
+
 def precalc_lower_bounds(G):
     """Pre-calculate the number of lower bounds of the graph nodes
     """
+    import networkx as nx
     G.lower_bounds = Counter()
     for n in G:
         G.lower_bounds[n] += 1
         for ans in nx.ancestors(G, n):
             G.lower_bounds[ans] += 1
+    G.corpus_size = len(G)
+    G.policy_lower_bounds = None
     G.descriptors.add("Pre-calculated lower bounds")
+    G.clear_compiled()
 
 
-def information_content(G, term):
+def information_content(G, term, digits=3, policy=None):
     """Information content
 
     Args:
         G(GoGraph): GoGraph object
         term(str): GO term
+        digits(int): number of decimal digits to round
+            (None: no rounding, full float precision)
+        policy: traversal policy (ex. "is_a", see
+            `pygosemsim.compiled.POLICIES`). If given, cached closure of
+            the policy is used instead of pre-calculated lower bounds
 
     Returns:
-        str - Information content
+        float - Information content
 
     Raises:
         PGSSLookupError: The term was not found in GoGraph
         PGSSInvalidOperation: see `pygosemsim.similarity.precalc_lower_bounds`
     """
+    if policy is not None:
+        from pygosemsim import compiled
+        ic = compiled.closure(G, policy).information_content(term)
+        return round_value(ic, digits)
     G.require("Pre-calculated lower bounds")
     if term not in G.lower_bounds:
         raise exception.PGSSLookupError(f"Missing term: {term}")
-    freq = G.lower_bounds[term] / len(G)
-    return round(-1 * math.log2(freq), 3)
+    freq = G.lower_bounds[term] / G.corpus_size
+    return round_value(-1 * math.log2(freq), digits)
 
 
-def lowest_common_ancestor(G, term1, term2):
+def lowest_common_ancestor(G, term1, term2, policy=None):
     """Naive implementation of lowest common ancestor (LCA)
 
     Args:
         G(GoGraph): GoGraph object
         term1(str): GO term
         term2(str): GO term
+        policy: traversal policy (ex. "is_a", see
+            `pygosemsim.compiled.POLICIES`). If given, cached closure of
+            the policy is used instead of pre-calculated lower bounds
 
     Returns:
         str - Lowest common ancestor term
@@ -55,6 +78,11 @@ def lowest_common_ancestor(G, term1, term2):
         PGSSLookupError: The term was not found in GoGraph
         PGSSInvalidOperation: see `pygosemsim.similarity.precalc_lower_bounds`
     """
+    if policy is not None:
+        from pygosemsim import compiled
+        return compiled.closure(G, policy).lowest_common_ancestor(
+            term1, term2)
+    import networkx as nx
     G.require("Pre-calculated lower bounds")
     if term1 not in G:
         raise exception.PGSSLookupError(f"Missing term: {term1}")
@@ -68,13 +96,15 @@ def lowest_common_ancestor(G, term1, term2):
     return min(common_ans, key=lambda x: G.lower_bounds[x])
 
 
-def resnik(G, term1, term2):
+def resnik(G, term1, term2, digits=3, policy=None):
     """Semantic similarity based on Resnik method
 
     Args:
         G(GoGraph): GoGraph object
         term1(str): GO term
         term2(str): GO term
+        digits(int): number of decimal digits to round (None: no rounding)
+        policy: traversal policy (see `information_content`)
 
     Returns:
         float - Resnik similarity value (Information content of LCA)
@@ -86,12 +116,12 @@ def resnik(G, term1, term2):
     """
     # TODO: may not work
     # mica = nx.lowest_common_ancestor(G, term1, term2)
-    mica = lowest_common_ancestor(G, term1, term2)
+    mica = lowest_common_ancestor(G, term1, term2, policy)
     if mica is not None:
-        return information_content(G, mica)
+        return information_content(G, mica, digits, policy)
 
 
-def norm_resnik(G, term1, term2):
+def norm_resnik(G, term1, term2, digits=3, policy=None):
     """Semantic similarity based on Resnik method.
     Information content of theoretically the most rare word (with frequency
     of 1 / corpus size) is used for normalization.
@@ -100,6 +130,8 @@ def norm_resnik(G, term1, term2):
         G(GoGraph): GoGraph object
         term1(str): GO term
         term2(str): GO term
+        digits(int): number of decimal digits to round (None: no rounding)
+        policy: traversal policy (see `information_content`)
 
     Returns:
         float - Normalized Resnik similarity in the range of 0 to 1
@@ -109,20 +141,27 @@ def norm_resnik(G, term1, term2):
         PGSSLookupError: The term was not found in GoGraph
         PGSSInvalidOperation: see `pygosemsim.similarity.precalc_lower_bounds`
     """
-    max_ic = -1 * math.log2(1 / len(G))
-    res = resnik(G, term1, term2)
+    res = resnik(G, term1, term2, digits, policy)
     if res is None:
         return
-    return round(res / max_ic, 3)
+    if policy is None:
+        size = G.corpus_size
+    else:
+        from pygosemsim import compiled
+        size = compiled.closure(G, policy).corpus_size
+    max_ic = -1 * math.log2(1 / size)
+    return round_value(res / max_ic, digits)
 
 
-def lin(G, term1, term2):
+def lin(G, term1, term2, digits=3, policy=None):
     """Semantic similarity based on Lin method.
 
     Args:
         G(GoGraph): GoGraph object
         term1(str): GO term
         term2(str): GO term
+        digits(int): number of decimal digits to round (None: no rounding)
+        policy: traversal policy (see `information_content`)
 
     Returns:
         float - Lin similarity
@@ -133,11 +172,11 @@ def lin(G, term1, term2):
         PGSSLookupError: The term was not found in GoGraph
         PGSSInvalidOperation: see `pygosemsim.similarity.precalc_lower_bounds`
     """
-    ic1 = information_content(G, term1)
-    ic2 = information_content(G, term2)
-    ic_lca = resnik(G, term1, term2)
+    ic1 = information_content(G, term1, digits, policy)
+    ic2 = information_content(G, term2, digits, policy)
+    ic_lca = resnik(G, term1, term2, digits, policy)
     try:
-        return round(2 * ic_lca / (ic1 + ic2), 3)
+        return round_value(2 * ic_lca / (ic1 + ic2), digits)
     except (TypeError, ZeroDivisionError):
         pass
 
@@ -145,7 +184,7 @@ def lin(G, term1, term2):
 default_wf = (("is_a", 0.8), ("part_of", 0.6))
 
 
-def s_values(G, term, weight_factor=default_wf):
+def s_values(G, term, weight_factor=default_wf, digits=3):
     wf = dict(weight_factor)
     sv = {term: 1}
     visited = set()
@@ -163,10 +202,12 @@ def s_values(G, term, weight_factor=default_wf):
                 if pred not in visited:
                     next_level.add(pred)
         level = next_level
-    return {k: round(v, 3) for k, v in sv.items()}
+    if digits is None:
+        return sv
+    return {k: round(v, digits) for k, v in sv.items()}
 
 
-def wang(G, term1, term2, weight_factor=default_wf):
+def wang(G, term1, term2, weight_factor=default_wf, digits=3):
     """Semantic similarity based on Wang method
 
     Args:
@@ -174,6 +215,7 @@ def wang(G, term1, term2, weight_factor=default_wf):
         term1(str): GO term
         term2(str): GO term
         weight_factor(tuple): custom weight factor params
+        digits(int): number of decimal digits to round (None: no rounding)
 
     Returns:
         float - Wang similarity value
@@ -185,16 +227,16 @@ def wang(G, term1, term2, weight_factor=default_wf):
         raise exception.PGSSLookupError(f"Missing term: {term1}")
     if term2 not in G:
         raise exception.PGSSLookupError(f"Missing term: {term2}")
-    sa = s_values(G, term1, weight_factor)
-    sb = s_values(G, term2, weight_factor)
+    sa = s_values(G, term1, weight_factor, digits)
+    sb = s_values(G, term2, weight_factor, digits)
     sva = sum(sa.values())
     svb = sum(sb.values())
     common = set(sa.keys()) & set(sb.keys())
     cv = sum(sa[c] + sb[c] for c in common)
-    return round(cv / (sva + svb), 3)
+    return round_value(cv / (sva + svb), digits)
 
 
-def pekar(G, term1, term2):
+def pekar(G, term1, term2, digits=3):
     """Edge-based similarity based on the method by Pekar et al.
     The original study deals with tree-structured taxonomy.
     In the context of DAG, LCA is defined as the node that have
@@ -204,6 +246,7 @@ def pekar(G, term1, term2):
         G(GoGraph): GoGraph object
         term1(str): GO term
         term2(str): GO term
+        digits(int): number of decimal digits to round (None: no rounding)
 
     Returns:
         float - similarity value
@@ -214,6 +257,7 @@ def pekar(G, term1, term2):
         PGSSInvalidOperation: see `pygosemsim.similarity.precalc_lower_bounds`
     """
     # TODO: not optimized yet
+    import networkx as nx
     mica = lowest_common_ancestor(G, term1, term2)
     ac = nx.shortest_path_length(G, source=mica, target=term1)
     bc = nx.shortest_path_length(G, source=mica, target=term2)
@@ -221,6 +265,96 @@ def pekar(G, term1, term2):
                key=lambda x: G.lower_bounds[x], default=mica)
     rootc = nx.shortest_path_length(G, source=root, target=mica)
     try:
-        return round(rootc / (ac + bc + rootc), 3)
+        return round_value(rootc / (ac + bc + rootc), digits)
     except ZeroDivisionError:
         pass
+
+
+def _pairwise_ic(G, method, terms1, terms2, policy=None):
+    """Batch calculation of IC based similarity over the cached closure
+    """
+    import numpy as np
+    from pygosemsim import compiled
+    if policy is None:
+        G.require("Pre-calculated lower bounds")
+    cl = compiled.closure(G, "all" if policy is None else policy)
+    res = np.full((len(terms1), len(terms2)), np.nan)
+    rows = np.array([i for i, t in enumerate(terms1) if t in G],
+                    dtype=np.int64)
+    cols = np.array([j for j, t in enumerate(terms2) if t in G],
+                    dtype=np.int64)
+    ri = np.array([cl.graph.index(terms1[i]) for i in rows], dtype=np.int64)
+    ci = np.array([cl.graph.index(terms2[j]) for j in cols], dtype=np.int64)
+    res[np.ix_(rows, cols)] = cl.pairwise_indices(ri, ci, method)
+    return res
+
+
+def _pairwise_wang(G, terms1, terms2, weight_factor=default_wf):
+    """Batch calculation of Wang similarity (s-values of each term are
+    calculated only once)
+    """
+    import numpy as np
+    svs = {}
+    for t in set(terms1) | set(terms2):
+        if t in G:
+            sv = s_values(G, t, weight_factor, digits=None)
+            svs[t] = (sv, sum(sv.values()))
+    res = np.full((len(terms1), len(terms2)), np.nan)
+    for i, t1 in enumerate(terms1):
+        if t1 not in svs:
+            continue
+        sa, sva = svs[t1]
+        for j, t2 in enumerate(terms2):
+            if t2 not in svs:
+                continue
+            sb, svb = svs[t2]
+            cv = sum(sa[c] + sb[c] for c in sa.keys() & sb.keys())
+            res[i, j] = cv / (sva + svb)
+    return res
+
+
+def pairwise(G, sim_method, terms1, terms2, digits=None, **kwargs):
+    """Batch calculation of semantic similarity between two term lists
+
+    Resnik, norm_resnik and Lin similarity are calculated at once over
+    the cached closure (see `pygosemsim.compiled.closure`) and s-values of
+    Wang method are calculated once per term. Other methods are called for
+    each pair of the terms.
+
+    Args:
+        G(GoGraph): GoGraph object
+        sim_method(function): semantic similarity function (ex. resnik)
+        terms1(list): GO terms
+        terms2(list): GO terms
+        digits(int): number of decimal digits to round the results
+            (default: None, full float precision)
+        kwargs: additional params of sim_method (ex. weight_factor, policy)
+
+    Returns:
+        numpy.ndarray - (len(terms1), len(terms2)) float64 array
+        NaN for the pairs of which similarity is None or the term was
+        not found in GoGraph
+
+    Raises:
+        PGSSInvalidOperation: see `pygosemsim.similarity.precalc_lower_bounds`
+    """
+    import numpy as np
+    if sim_method in (resnik, norm_resnik, lin):
+        res = _pairwise_ic(G, sim_method.__name__, terms1, terms2, **kwargs)
+    elif sim_method is wang:
+        res = _pairwise_wang(G, terms1, terms2, **kwargs)
+    else:
+        if "digits" in inspect.signature(sim_method).parameters:
+            kwargs["digits"] = None
+        res = np.full((len(terms1), len(terms2)), np.nan)
+        for i, t1 in enumerate(terms1):
+            for j, t2 in enumerate(terms2):
+                try:
+                    sim = sim_method(G, t1, t2, **kwargs)
+                except exception.PGSSLookupError:
+                    continue
+                if sim is not None:
+                    res[i, j] = sim
+    if digits is not None:
+        res = np.round(res, digits)
+    return res
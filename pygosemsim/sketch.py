@@ -0,0 +1,221 @@
+
+import math
+
+import numpy as np
+
+from pygosemsim import compiled
+
+
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def num_perm_for(error, delta=0.05):
+    """Number of MinHash permutations required for the estimation error
+    of Jaccard index to be within the given error with probability
+    1 - delta (Hoeffding's inequality)
+    """
+    return math.ceil(math.log(2 / delta) / (2 * error ** 2))
+
+
+def error_bound(num_perm, delta=0.05):
+    """Estimation error bound of Jaccard index with probability 1 - delta
+    (inverse of `num_perm_for`)
+    """
+    return math.sqrt(math.log(2 / delta) / (2 * num_perm))
+
+
+class MinHashSketch(object):
+    """MinHash signatures of propagated annotations of AnnotationIndex
+    for approximate SimUI (Jaccard index) calculation
+
+    Attributes:
+        index(AnnotationIndex): the annotation index
+        num_perm(int): number of hash permutations (signature length)
+        delta(float): error probability of the error bound
+        error(float): estimation error bound of each Jaccard index
+            with probability 1 - delta
+        signatures(numpy.ndarray): (len(index), num_perm) MinHash values
+        empty(numpy.ndarray): flags of genes without annotations
+    """
+    def __init__(self, index, num_perm, delta, signatures):
+        self.index = index
+        self.num_perm = num_perm
+        self.delta = delta
+        self.error = error_bound(num_perm, delta)
+        self.signatures = signatures
+        self.empty = np.diff(index.indptr) == 0
+
+    def jaccard(self, gene1, gene2):
+        """Estimated Jaccard index between two genes
+
+        Returns:
+            float - estimated similarity
+            or None if the propagated annotations are both empty
+        """
+        i = self.index.gene_index[gene1]
+        j = self.index.gene_index[gene2]
+        if self.empty[i] and self.empty[j]:
+            return
+        return float(np.mean(self.signatures[i] == self.signatures[j]))
+
+    def pairwise(self, genes=None, chunk_size=10 ** 7):
+        """Estimated Jaccard index of all pairs of the given genes
+
+        All len(genes) ** 2 pairs are compared over num_perm hash values,
+        so this is intended for a subset of genes. Use `candidates` to find
+        similar gene pairs in the whole index without comparing all pairs.
+
+        Args:
+            genes(iterable): gene IDs (default: all genes in the index)
+            chunk_size(int): max number of hash values compared at once
+
+        Returns:
+            numpy.ndarray - (len(genes), len(genes)) similarity matrix
+            NaN for pairs whose propagated annotations are both empty
+            (same as `pygosemsim.gene_set.sim_ui`)
+        """
+        if genes is None:
+            rows = np.arange(len(self.index.genes))
+        else:
+            rows = np.array([self.index.gene_index[g] for g in genes],
+                            dtype=np.int64)
+        sig = self.signatures[rows]
+        n = len(rows)
+        res = np.empty((n, n))
+        # Compare in row blocks
+        block = max(1, chunk_size // max(1, n * self.num_perm))
+        for b in range(0, n, block):
+            res[b:b + block] = np.count_nonzero(
+                sig[b:b + block, None, :] == sig[None, :, :], axis=2)
+        res /= self.num_perm
+        empty = self.empty[rows]
+        res[np.outer(empty, empty)] = np.nan
+        return res
+
+
+def minhash(index, error=0.1, delta=0.05, num_perm=None, seed=0,
+            chunk_size=10 ** 7):
+    """Build MinHash signatures of propagated annotations
+
+    Args:
+        index(AnnotationIndex): AnnotationIndex object
+        error(float): acceptable estimation error of Jaccard index
+        delta(float): probability that the error exceeds the bound
+        num_perm(int): number of permutations (overrides error)
+        seed(int): random seed of hash functions
+        chunk_size(int): max number of hash values calculated at once
+
+    Returns:
+        MinHashSketch - the sketch
+    """
+    if num_perm is None:
+        num_perm = num_perm_for(error, delta)
+    rnd = np.random.RandomState(seed)
+    a = rnd.randint(1, MERSENNE_PRIME, size=num_perm).astype(np.int64)
+    b = rnd.randint(0, MERSENNE_PRIME, size=num_perm).astype(np.int64)
+    # Universal hashing of term columns: (a * x + b) mod p
+    # (terms x permutations table, values fit in int32)
+    cols = np.arange(len(index.terms), dtype=np.int64)
+    hv = np.empty((len(cols), num_perm), dtype=np.int32)
+    step = max(1, chunk_size // max(1, num_perm))
+    for k in range(0, len(cols), step):
+        hv[k:k + step] = (cols[k:k + step, None] * a[None, :] + b[None, :]) \
+            % MERSENNE_PRIME
+    signatures = np.full((len(index.genes), num_perm), MERSENNE_PRIME,
+                         dtype=np.int64)
+    # Minimum of the rows of the propagated terms of each gene
+    # (in blocks of genes)
+    nonempty = np.flatnonzero(np.diff(index.indptr))
+    lo = 0
+    while lo < len(nonempty):
+        start = index.indptr[nonempty[lo]]
+        hi = np.searchsorted(index.indptr[nonempty + 1], start + step,
+                             "right")
+        hi = max(lo + 1, hi)
+        rows = nonempty[lo:hi]
+        vals = hv[index.indices[start:index.indptr[rows[-1] + 1]]]
+        signatures[rows] = np.minimum.reduceat(
+            vals, index.indptr[rows] - start, axis=0)
+        lo = hi
+    return MinHashSketch(index, num_perm, delta, signatures)
+
+
+def lsh_params(num_perm, threshold):
+    """Choose the number of LSH bands and rows per band. The estimated
+    threshold (1 / bands) ** (1 / rows) is the nearest to the given one
+    without exceeding it, so that recall is prioritized.
+
+    Returns:
+        tuple(int, int) - bands and rows
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold:
+            best = (bands, rows)
+    return best
+
+
+def candidates(sketch, threshold=0.5, bands=None, chunk_size=10 ** 7):
+    """Candidate gene pairs with high similarity found by Locality
+    Sensitive Hashing (LSH) of MinHash signatures, without comparing all
+    gene pairs. This is the scalable entry point for the whole index
+    (`MinHashSketch.pairwise` compares all pairs).
+
+    Args:
+        sketch(MinHashSketch): MinHashSketch object
+        threshold(float): Jaccard index threshold
+        bands(int): number of LSH bands (default: chosen by `lsh_params`)
+        chunk_size(int): max number of hash values compared at once
+
+    Returns:
+        list - (gene1, gene2, estimated Jaccard index) tuples of which the
+        estimates are equal to or greater than the threshold, in descending
+        order of the estimates. Each estimate has the error bound of
+        `MinHashSketch.error`.
+    """
+    if bands is None:
+        bands, rows = lsh_params(sketch.num_perm, threshold)
+    else:
+        rows = sketch.num_perm // bands
+    genes = np.flatnonzero(~sketch.empty)
+    if not len(genes):
+        return []
+    n = len(sketch.index.genes)
+    # Random odd multipliers to hash each band into one integer
+    # (collisions only add candidates to be verified)
+    mult = np.random.RandomState(0).randint(
+        1, 1 << 62, size=rows, dtype=np.int64).astype(np.uint64) | 1
+    pairs = []
+    for band in range(bands):
+        keys = sketch.signatures[genes, band * rows:(band + 1) * rows] \
+            .astype(np.uint64) @ mult
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        members = genes[order]
+        # Pair each member with the following members of the same bucket
+        heads = np.flatnonzero(np.diff(keys, prepend=keys[:1] + 1))
+        ends = np.repeat(np.append(heads[1:], len(keys)),
+                         np.diff(np.append(heads, len(keys))))
+        pos = np.arange(len(keys))
+        cnt = ends - pos - 1
+        pairs.append(np.repeat(members * n, cnt)
+                     + members[compiled.concat_ranges(pos + 1, cnt)])
+    pairs = np.unique(np.concatenate(pairs))
+    if not len(pairs):
+        return []
+    # Verify the candidates by the estimates (in chunks of pairs)
+    hits = []
+    step = max(1, chunk_size // sketch.num_perm)
+    for k in range(0, len(pairs), step):
+        i, j = np.divmod(pairs[k:k + step], n)
+        est = np.count_nonzero(
+            sketch.signatures[i] == sketch.signatures[j], axis=1) \
+            / sketch.num_perm
+        hit = est >= threshold
+        hits.append((i[hit], j[hit], est[hit]))
+    i, j, est = (np.concatenate(a) for a in zip(*hits))
+    order = np.argsort(-est, kind="stable")
+    g = sketch.index.genes
+    return [(g[p], g[q], float(e)) for p, q, e in zip(
+        i[order], j[order], est[order])]
@@ -1,16 +1,16 @@
 
-from pygosemsim import exception
+from pygosemsim import exception, similarity
 
 
-def sim_func(G, sim_method, term1, term2):
+def sim_func(G, sim_method, term1, term2, **kwargs):
     try:
-        sim = sim_method(G, term1, term2)
+        sim = sim_method(G, term1, term2, **kwargs)
     except exception.PGSSLookupError:
         return
     return sim
 
 
-def sim_max(terms1, terms2, sem_sim):
+def sim_max(terms1, terms2, sem_sim, digits=3):
     """Similarity score between two term sets based on maximum value
     """
     sims = []
@@ -19,10 +19,10 @@ def sim_max(terms1, terms2, sem_sim):
             sim = sem_sim(t1, t2)
             if sim is not None:
                 sims.append(sim)
-    return round(max(sims), 3)
+    return similarity.round_value(max(sims), digits)
 
 
-def sim_avg(terms1, terms2, sem_sim):
+def sim_avg(terms1, terms2, sem_sim, digits=3):
     """Similarity between two term sets based on average
     """
     sims = []
@@ -33,10 +33,10 @@ def sim_avg(terms1, terms2, sem_sim):
                 sims.append(sim)
     if not sims:
         return
-    return round(sum(sims) / len(sims), 3)
+    return similarity.round_value(sum(sims) / len(sims), digits)
 
 
-def sim_bma(terms1, terms2, sem_sim):
+def sim_bma(terms1, terms2, sem_sim, digits=3):
     """Similarity between two term sets based on Best-Match Average (BMA)
     """
     sims = []
@@ -58,4 +58,4 @@ def sim_bma(terms1, terms2, sem_sim):
             sims.append(max(row))
     if not sims:
         return
-    return round(sum(sims) / len(sims), 3)
+    return similarity.round_value(sum(sims) / len(sims), digits)
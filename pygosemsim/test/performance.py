@@ -5,11 +5,16 @@
 #
 
 import functools
+import random
+import time
+import tracemalloc
 import unittest
 
 import networkx as nx
+import numpy as np
 
-from pygosemsim import annotation, graph, similarity, term_set
+from pygosemsim import (
+    annotation, compiled, gene_set, graph, similarity, sketch, term_set)
 from pygosemsim.util import debug
 
 
@@ -26,3 +31,212 @@ class TestPerformance(unittest.TestCase):
         trpa1 = self.annot["O75762"]["annotation"].keys()
         sf = functools.partial(term_set.sim_func, self.G, similarity.lin)
         print(term_set.sim_bma(trpv1, trpa1, sf))
+
+
+def synthetic_obo_lines(size, seed=0):
+    """Random DAG ontology in OBO format (random recursive tree with
+    extra part_of edges on 20% of terms)
+    """
+    rnd = random.Random(seed)
+    namespaces = ["biological_process", "molecular_function",
+                  "cellular_component"]
+    yield "format-version: 1.2"
+    for i in range(size):
+        yield "[Term]"
+        yield f"id: SYN:{i:07d}"
+        yield f"name: synthetic term {i} of the random ontology"
+        yield f"namespace: {namespaces[i % 3]}"
+        if i:
+            yield f"is_a: SYN:{rnd.randrange(i):07d}"
+            if i > 1 and rnd.random() < 0.2:
+                yield f"relationship: part_of SYN:{rnd.randrange(i):07d}"
+        yield ""
+
+
+def timeit(label, func, *args, **kwargs):
+    start = time.perf_counter()
+    res = func(*args, **kwargs)
+    print(f"{label}: {time.perf_counter() - start:.3f} sec")
+    return res
+
+
+def timeit_peak(label, func, *args, **kwargs):
+    """timeit with peak memory allocated during the call"""
+    tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        res = func(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    finally:
+        tracemalloc.stop()
+    print(f"{label}: {elapsed:.3f} sec, peak {peak:.1f}MB")
+    return res
+
+
+class TestScaling(unittest.TestCase):
+    """Scaling benchmark on 200k nodes synthetic ontology"""
+    size = 200000
+
+    @classmethod
+    def setUpClass(cls):
+        cls.lines = list(synthetic_obo_lines(cls.size))
+
+    def test_compiled(self):
+        CG = timeit("compiled.from_obo_lines", compiled.from_obo_lines,
+                    self.lines)
+        cl = timeit("closure (all)", CG.closure)
+        timeit("closure (is_a)", CG.closure, ["is_a"])
+        print(f"mean closure size: {len(cl.indices) / len(CG):.1f}")
+        terms = CG.terms[-100:]
+        timeit("one_vs_all (lin)", cl.one_vs_all, terms[0], "lin")
+        timeit("pairwise 100x100 (lin)", cl.pairwise, terms, terms, "lin")
+
+    def test_networkx(self):
+        G = timeit("graph.from_obo_lines", graph.from_obo_lines, self.lines)
+        timeit("precalc_lower_bounds", similarity.precalc_lower_bounds, G)
+        terms = list(G)[-10:]
+        timeit("pairwise 10x10 (lin)", similarity.pairwise,
+               G, similarity.lin, terms, terms)
+
+
+def synthetic_gaf_lines(genes, terms, per_gene=15, family_size=1, seed=0):
+    """Random gene annotations in GAF 2.1 format. Genes in the same family
+    share all but 3 annotated terms.
+    """
+    rnd = random.Random(seed)
+    codes = ["IEA", "IDA", "IBA", "IPI", "TAS", "ISS"]
+    yield "!gaf-version: 2.1"
+    for g in range(genes):
+        if not g % family_size:
+            base = [rnd.randrange(terms) for _ in range(per_gene - 3)]
+        own = [rnd.randrange(terms) for _ in range(3)]
+        for t in base + own:
+            row = [
+                "UniProtKB", f"P{g:05d}", f"GENE{g}", "",
+                f"SYN:{t:07d}", "PMID:0000000",
+                rnd.choice(codes), "", "P", f"Synthetic protein {g}",
+                "", "protein", "taxon:9606", "20180101", "UniProt", "", ""
+            ]
+            yield "\t".join(row)
+
+
+class TestMemory(unittest.TestCase):
+    """Memory footprint of loaded graph and annotations
+    (GO and GOA human sized synthetic data)
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.obo_lines = list(synthetic_obo_lines(45000))
+        cls.gaf_lines = list(synthetic_gaf_lines(20000, 45000))
+
+    def report(self, label, default, compact):
+        d = debug.total_size(default) / (1024 * 1024)
+        c = debug.total_size(compact) / (1024 * 1024)
+        print(f"{label}: {d:.1f}MB -> {c:.1f}MB "
+              f"({(1 - c / d) * 100:.1f}% reduction)")
+
+    def test_graph(self):
+        G = graph.from_obo_lines(self.obo_lines)
+        G_compact = graph.from_obo_lines(self.obo_lines, compact=True)
+        self.report("GoGraph", G, G_compact)
+
+    def test_annotation(self):
+        annot = annotation.from_gaf_lines(self.gaf_lines)
+        annot_compact = annotation.from_gaf_lines(self.gaf_lines,
+                                                  compact=True)
+        self.report("Annotation", annot, annot_compact)
+
+
+class TestOneVsAll(unittest.TestCase):
+    """One gene vs. the whole proteome (GO and GOA human sized
+    synthetic data)
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.G = graph.from_obo_lines(synthetic_obo_lines(45000))
+        similarity.precalc_lower_bounds(cls.G)
+        cls.annot = annotation.from_gaf_lines(
+            synthetic_gaf_lines(20000, 45000))
+        cls.index = timeit("gene_set.build_index", gene_set.build_index,
+                           cls.G, cls.annot)
+        cls.query = list(cls.annot["P00000"]["annotation"].keys())
+
+    def test_one_vs_all(self):
+        timeit("compiled.closure", compiled.closure, self.G)
+        for agg in ("bma", "max", "avg"):
+            scores = timeit(f"one_vs_all ({agg}, 20000 genes)",
+                            gene_set.one_vs_all, self.G, self.index,
+                            self.query, aggregate=agg)
+        timeit("rank", gene_set.rank, self.index, scores)
+
+    def test_term_set(self):
+        sf = functools.partial(term_set.sim_func, self.G, similarity.lin)
+        genes = self.index.genes[:20]
+        timeit(f"term_set.sim_bma ({len(genes)} genes)", lambda: [
+            term_set.sim_bma(self.query, self.annot[g]["annotation"].keys(),
+                             sf) for g in genes])
+
+
+class TestApproximate(unittest.TestCase):
+    """MinHash/LSH candidate pairs vs. exact engines at whole-GOA size
+    (GO sized synthetic ontology, 20000 genes in families of 5 genes)
+    """
+    size = 20000
+    threshold = 0.5
+
+    @classmethod
+    def setUpClass(cls):
+        cls.G = graph.from_obo_lines(synthetic_obo_lines(45000))
+        similarity.precalc_lower_bounds(cls.G)
+        cls.annot = annotation.from_gaf_lines(
+            synthetic_gaf_lines(cls.size, 45000, family_size=5))
+        cls.index = gene_set.build_index(cls.G, cls.annot)
+
+    def exact_pairs(self):
+        """Pairs of exact SimUI >= threshold (row blocks of the matrix)
+        """
+        exact = timeit_peak(f"gene_set.sim_ui ({self.size} genes)",
+                            gene_set.sim_ui, self.index)
+        pairs = set()
+        genes = self.index.genes
+        for b in range(0, self.size, 1000):
+            i, j = np.nonzero(exact[b:b + 1000] >= self.threshold)
+            pairs.update((genes[p + b], genes[q])
+                         for p, q in zip(i, j) if p + b < q)
+        return pairs
+
+    def test_exact_bma(self):
+        # All pairs by the exact BMA engines (estimated from samples)
+        n_pairs = self.size * (self.size - 1) // 2
+        sf = functools.partial(term_set.sim_func, self.G, similarity.lin)
+        genes = self.index.genes
+        start = time.perf_counter()
+        for g1, g2 in zip(genes[:100], genes[100:200]):
+            term_set.sim_bma(self.annot[g1]["annotation"].keys(),
+                             self.annot[g2]["annotation"].keys(), sf)
+        per_pair = (time.perf_counter() - start) / 100
+        print(f"term_set.sim_bma: {per_pair * 1000:.1f} msec/pair, "
+              f"all {n_pairs} pairs: {per_pair * n_pairs / 3600:.0f} hours")
+        start = time.perf_counter()
+        for g in genes[:5]:
+            gene_set.one_vs_all(self.G, self.index,
+                                self.index.annotation(g))
+        per_gene = (time.perf_counter() - start) / 5
+        print(f"gene_set.one_vs_all (bma): {per_gene:.2f} sec/gene, "
+              f"all genes: {per_gene * self.size / 3600:.1f} hours")
+
+    def test_candidates(self):
+        expected = self.exact_pairs()
+        for error in (0.2, 0.1, 0.05):
+            print(f"error: {error}")
+            mh = timeit_peak("sketch.minhash", sketch.minhash, self.index,
+                             error=error)
+            res = timeit_peak("sketch.candidates", sketch.candidates, mh,
+                              self.threshold)
+            found = {(g1, g2) for g1, g2, _ in res}
+            tp = len(found & expected)
+            print(f"num_perm: {mh.num_perm}, error bound: {mh.error:.3f}")
+            print(f"recall: {tp / len(expected):.3f}, "
+                  f"precision: {tp / max(1, len(found)):.3f} "
+                  f"({len(found)} found, {len(expected)} expected)")
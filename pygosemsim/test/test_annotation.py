@@ -0,0 +1,56 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import unittest
+
+from pygosemsim import annotation, gene_set, graph
+
+
+GAF_ROWS = [
+    ["UniProtKB", "A", "GA", "", "3", "", "IDA", "", "P", "a", "",
+     "protein"],
+    ["UniProtKB", "A", "GA", "NOT", "5", "", "IDA", "", "P", "a", "",
+     "protein"],
+    ["UniProtKB", "B", "GB", "", "5", "", "IEA", "", "P", "b", "",
+     "protein"]
+]
+
+
+class TestAnnotation(unittest.TestCase):
+    def setUp(self):
+        self.lines = ["!gaf-version: 2.1"] + ["\t".join(r) for r in GAF_ROWS]
+
+    def test_compact(self):
+        annots = annotation.from_gaf_lines(self.lines)
+        compact = annotation.from_gaf_lines(self.lines, compact=True)
+        self.assertEqual(compact["A"]["db_object_symbol"], "GA")
+        self.assertEqual(compact["B"]["annotation"]["5"]["evidence_code"],
+                         "IEA")
+        self.assertEqual(list(compact["A"]["annotation"]), ["3"])
+        self.assertEqual(compact["A"].annotation["3"].qualifier, ("",))
+        with self.assertRaises(KeyError):
+            compact["A"]["unknown"]
+        # Dict-style access
+        gene = compact["A"]
+        self.assertIn("annotation", gene)
+        self.assertNotIn("unknown", gene)
+        self.assertNotIn(0, gene)
+        self.assertEqual(set(gene), set(annots["A"]))
+        self.assertEqual(len(gene), len(annots["A"]))
+        self.assertEqual(gene.get("db_object_name"), "a")
+        self.assertIsNone(gene.get("unknown"))
+        self.assertEqual(dict(gene.items()), gene.to_dict())
+        self.assertEqual(dict(gene)["db_object_type"], "protein")
+        for k, v in annots["B"]["annotation"]["5"].items():
+            if k != "qualifier":
+                self.assertEqual(compact["B"]["annotation"]["5"][k], v)
+        # Same closures as the default mode
+        G = graph.GoGraph()
+        G.add_edges_from([("0", "1"), ("0", "2"), ("1", "3"), ("2", "5")])
+        idx = gene_set.build_index(G, annots)
+        idx_compact = gene_set.build_index(G, compact)
+        for g in ("A", "B"):
+            self.assertEqual(idx.closure(g), idx_compact.closure(g))
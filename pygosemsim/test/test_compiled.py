@@ -0,0 +1,166 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import itertools
+import math
+import re
+import subprocess
+import sys
+import unittest
+
+import numpy as np
+
+from pygosemsim import compiled, exception, graph, similarity
+
+
+OBO_LINES = """format-version: 1.2
+ontology: chebi
+
+[Term]
+id: CHEBI:1
+name: chemical entity
+
+[Term]
+id: CHEBI:2
+name: molecular entity
+is_a: CHEBI:1
+
+[Term]
+id: CHEBI:3
+name: ion
+alt_id: CHEBI:30
+is_a: CHEBI:2 {source="test"} ! molecular entity
+
+[Term]
+id: CHEBI:4
+name: role
+relationship: has_role CHEBI:1 ! chemical entity
+
+[Term]
+id: CHEBI:5
+name: obsolete entity
+is_obsolete: true
+is_a: CHEBI:1
+
+[Typedef]
+id: has_role
+name: has role
+""".splitlines()
+
+
+class TestCompiled(unittest.TestCase):
+    def test_lazy_import(self):
+        code = ("import sys; import pygosemsim.compiled; "
+                "print('networkx' in sys.modules)")
+        res = subprocess.run([sys.executable, "-c", code],
+                             stdout=subprocess.PIPE, check=True)
+        self.assertEqual(res.stdout.strip(), b"False")
+
+    def test_empty_value(self):
+        for line in ("is_a:", "is_a: ! comment", "relationship: part_of"):
+            lines = OBO_LINES[:4] + ["id: CHEBI:9", "name: test", line]
+            with self.assertRaisesRegex(AssertionError, re.escape(line)):
+                compiled.from_obo_lines(lines)
+
+    def test_obo(self):
+        G = graph.from_obo_lines(OBO_LINES)
+        self.assertIsNone(G.nodes["CHEBI:1"]["namespace"])
+        self.assertEqual(G.edges["CHEBI:1", "CHEBI:4"]["type"], "has_role")
+        G = graph.from_obo_lines(OBO_LINES, relations=["is_a"])
+        self.assertEqual(G.number_of_edges(), 2)
+        CG = compiled.from_obo_lines(OBO_LINES)
+        self.assertEqual(len(CG), 4)
+        self.assertEqual(CG.index("CHEBI:30"), CG.index("CHEBI:3"))
+        with self.assertRaises(exception.PGSSLookupError):
+            CG.index("CHEBI:5")
+        cl = CG.closure()
+        self.assertEqual(cl.ancestors("CHEBI:4"), {"CHEBI:1"})
+        cl = CG.closure("is_a")
+        self.assertEqual(cl.ancestors("CHEBI:4"), set())
+        self.assertEqual(cl.ancestors("CHEBI:3"), {"CHEBI:1", "CHEBI:2"})
+        self.assertIsNone(cl.lowest_common_ancestor("CHEBI:3", "CHEBI:4"))
+        res = cl.pairwise(["CHEBI:3"], ["CHEBI:4", "CHEBI:2"])
+        self.assertTrue(math.isnan(res[0, 0]))
+        self.assertEqual(res[0, 1], cl.information_content("CHEBI:2"))
+        self.assertEqual(
+            compiled.from_obo_lines(OBO_LINES, relations=["is_a"])
+            .closure().lower_bounds.tolist(), cl.lower_bounds.tolist())
+
+    def test_similarity(self):
+        G = graph.GoGraph()
+        G.add_nodes_from(range(15))
+        G.add_edges_from([
+            (0, 1), (1, 3), (1, 4), (1, 5), (1, 6), (1, 7),
+            (0, 2), (2, 8), (8, 9), (9, 3), (2, 10), (10, 11), (11, 4),
+            (12, 13), (13, 14), (7, 12)
+        ], type="is_a")
+        similarity.precalc_lower_bounds(G)
+        cl = compiled.from_graph(G).closure()
+        for n in G:
+            self.assertEqual(cl.lower_bounds[cl.graph.index(n)],
+                             G.lower_bounds[n])
+        self.assertEqual(cl.lowest_common_ancestor(3, 4), 2)
+        self.assertIsNone(cl.lin(0, 0))
+        self.assertEqual(cl.resnik(0, 0), 0)
+        pairs = list(itertools.product(range(15), repeat=2))
+        for t1, t2 in pairs:
+            for method in ("resnik", "norm_resnik", "lin"):
+                expected = getattr(similarity, method)(G, t1, t2, digits=None)
+                res = getattr(cl, method)(t1, t2)
+                if expected is None:
+                    self.assertIsNone(res)
+                else:
+                    self.assertAlmostEqual(res, expected)
+        res = cl.pairwise([3, 6], [4, 7, 13], method="lin")
+        self.assertEqual(res.shape, (2, 3))
+        self.assertAlmostEqual(
+            res[1, 1], similarity.lin(G, 6, 7, digits=None))
+        ova = cl.one_vs_all(3)
+        self.assertEqual(len(ova), 15)
+        self.assertAlmostEqual(ova[cl.graph.index(4)],
+                               similarity.resnik(G, 3, 4, digits=None))
+        self.assertFalse(np.isnan(ova).any())
+
+    def test_policy(self):
+        G = graph.GoGraph()
+        G.add_nodes_from(range(7))
+        G.add_edges_from([(0, 1), (1, 2), (0, 3)], type="is_a")
+        G.add_edges_from([(3, 4), (1, 5)], type="part_of")
+        G.add_edges_from([(2, 6)], type="regulates")
+        CG = compiled.from_graph(G)
+        self.assertIs(CG.closure("all"), CG.closure())
+        self.assertIs(CG.closure("is_a+part_of"),
+                      CG.closure(["part_of", "is_a"]))
+        with self.assertRaises(ValueError):
+            CG.closure("unknown")
+        self.assertEqual(CG.closure("is_a").ancestors(4), set())
+        self.assertEqual(CG.closure("is_a+part_of").ancestors(4), {0, 3})
+        self.assertEqual(CG.closure("is_a+part_of").ancestors(6), set())
+        self.assertEqual(CG.closure().ancestors(6), {0, 1, 2})
+        # GoGraph integration
+        similarity.precalc_lower_bounds(G)
+        for t1, t2 in itertools.product(range(7), repeat=2):
+            self.assertEqual(
+                similarity.lin(G, t1, t2, policy="all"),
+                similarity.lin(G, t1, t2))
+        self.assertEqual(similarity.lowest_common_ancestor(G, 2, 5), 1)
+        self.assertIsNone(
+            similarity.lowest_common_ancestor(G, 2, 5, policy="is_a"))
+        self.assertEqual(
+            similarity.information_content(G, 1, digits=None, policy="is_a"),
+            math.log2(7 / 2))
+        self.assertIsNone(similarity.resnik(G, 4, 0, policy="is_a"))
+        # regulates edge is not traversed
+        self.assertEqual(similarity.resnik(G, 4, 0, policy="is_a+part_of"),
+                         round(math.log2(7 / 6), 3))
+        self.assertIs(compiled.closure(G, "is_a"), G.compiled.closure("is_a"))
+        G.clear_compiled()
+        self.assertIsNone(G.compiled)
+
+    def test_cycle(self):
+        CG = compiled.from_edges([], [(0, 1, "is_a"), (1, 0, "is_a")])
+        with self.assertRaises(exception.PGSSInvalidOperation):
+            CG.closure()
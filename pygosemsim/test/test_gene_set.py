@@ -0,0 +1,152 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import functools
+import math
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from pygosemsim import gene_set, graph, similarity, term_set
+
+
+def annot_record(uid, terms):
+    return {
+        "db_object_id": uid,
+        "annotation": {
+            t: {"go_id": t, "qualifier": [""], "evidence_code": code}
+            for t, code in terms
+        }
+    }
+
+
+class TestGeneSet(unittest.TestCase):
+    def setUp(self):
+        G = graph.GoGraph()
+        G.add_nodes_from(range(8))
+        G.add_edges_from([
+            (0, 1), (0, 2), (1, 3), (1, 4), (2, 5), (4, 6), (5, 6),
+        ])
+        G.alt_ids[10] = 3
+        self.G = G
+        self.annots = {
+            "A": annot_record("A", [(3, "IDA"), (6, "IEA")]),
+            "B": annot_record("B", [(10, "IDA")]),  # alt ID of 3
+            "C": annot_record("C", [(5, "IMP"), (99, "IDA")]),  # 99: missing
+            "D": annot_record("D", [(4, "IEA")]),
+            "E": annot_record("E", [(7, "IDA")])  # isolated node
+        }
+
+    def test_build_index(self):
+        idx = gene_set.build_index(self.G, self.annots)
+        self.assertEqual(len(idx), 5)
+        self.assertEqual(idx.closure("A"), {0, 1, 2, 3, 4, 5, 6})
+        self.assertEqual(idx.closure("B"), {0, 1, 3})
+        self.assertEqual(idx.closure("C"), {0, 2, 5})
+        self.assertEqual(idx.closure("E"), {7})
+        counts = dict(zip(idx.terms, idx.term_counts()))
+        self.assertEqual(counts[0], 4)
+        self.assertEqual(counts[1], 3)
+        self.assertEqual(counts[6], 1)
+        ic = dict(zip(idx.terms, idx.information_content()))
+        # 5 genes with non-empty rows (E is annotated to the isolated node)
+        self.assertAlmostEqual(ic[0], -math.log2(4 / 5))
+        # D has no valid annotation and is not counted
+        idx = gene_set.build_index(self.G, self.annots,
+                                   exclude_evidence=["IEA"])
+        ic = dict(zip(idx.terms, idx.information_content()))
+        self.assertAlmostEqual(ic[0], -math.log2(3 / 4))
+
+    def test_evidence_filter(self):
+        idx = gene_set.build_index(self.G, self.annots,
+                                   exclude_evidence=["IEA"])
+        self.assertEqual(idx.closure("A"), {0, 1, 3})
+        self.assertEqual(idx.closure("D"), set())
+        idx = gene_set.build_index(self.G, self.annots,
+                                   evidence_codes=["IMP"])
+        self.assertEqual(idx.closure("C"), {0, 2, 5})
+        self.assertEqual(idx.closure("A"), set())
+
+    def test_policy(self):
+        nx.set_edge_attributes(self.G, "is_a", "type")
+        self.G.edges[4, 6]["type"] = "part_of"
+        idx = gene_set.build_index(self.G, self.annots, policy="is_a")
+        self.assertEqual(idx.closure("A"), {0, 1, 2, 3, 5, 6})
+        idx = gene_set.build_index(self.G, self.annots, policy="all")
+        self.assertEqual(idx.closure("A"), {0, 1, 2, 3, 4, 5, 6})
+
+    def test_similarity(self):
+        idx = gene_set.build_index(self.G, self.annots)
+        genes = ["A", "B", "C", "D", "E"]
+        ui = gene_set.sim_ui(idx, genes)
+        self.assertEqual(ui.shape, (5, 5))
+        self.assertAlmostEqual(ui[0, 0], 1)
+        self.assertAlmostEqual(ui[0, 1], 3 / 7)
+        self.assertAlmostEqual(ui[1, 2], 1 / 5)
+        self.assertAlmostEqual(ui[0, 4], 0)
+        self.assertTrue((ui == ui.T).all())
+        ic = idx.information_content()
+        gic = gene_set.sim_gic(idx, ["B", "C"], ic)
+        w = dict(zip(idx.terms, ic))
+        expected = w[0] / (w[0] + w[1] + w[3] + w[2] + w[5])
+        self.assertAlmostEqual(gic[0, 1], expected)
+        # Subset order is preserved
+        sub = gene_set.sim_ui(idx, ["C", "A"])
+        self.assertAlmostEqual(sub[0, 1], ui[2, 0])
+        # Sparse and dense products of intersections
+        gic = gene_set.sim_gic(idx, genes, ic)
+        for ratio in (0, 0.5, 1):
+            res = gene_set._weighted_jaccard(idx, genes, ic, ratio, 1)
+            self.assertTrue(np.allclose(res, gic, equal_nan=True))
+        # Genes whose annotations are all filtered out do not change IC
+        filtered = dict(self.annots)
+        for i in range(100):
+            filtered[f"X{i}"] = annot_record(f"X{i}", [(5, "IEA")])
+        opts = {"exclude_evidence": ["IEA"]}
+        idx1 = gene_set.build_index(self.G, self.annots, **opts)
+        idx2 = gene_set.build_index(self.G, filtered, **opts)
+        self.assertTrue(np.allclose(
+            gene_set.sim_gic(idx1, ["A", "B", "C"]),
+            gene_set.sim_gic(idx2, ["A", "B", "C"])))
+        # Empty annotation
+        idx = gene_set.build_index(self.G, self.annots,
+                                   exclude_evidence=["IEA"])
+        ui = gene_set.sim_ui(idx, ["D", "D", "A"])
+        self.assertTrue(math.isnan(ui[0, 1]))
+        self.assertEqual(ui[0, 2], 0)
+
+    def test_one_vs_all(self):
+        # Edges without type attribute are regarded as is_a
+        similarity.precalc_lower_bounds(self.G)
+        self.annots["F"] = annot_record("F", [(99, "IDA")])  # no valid terms
+        idx = gene_set.build_index(self.G, self.annots)
+        self.assertEqual(idx.annotation("A"), {3, 6})
+        self.assertEqual(idx.annotation("B"), {3})
+        self.assertEqual(idx.annotation("F"), set())
+        query = [4, 5, 7, 99]
+        for method in ("resnik", "lin"):
+            sf = functools.partial(term_set.sim_func, self.G,
+                                   getattr(similarity, method), digits=None)
+            for agg in ("bma", "max", "avg"):
+                scores = gene_set.one_vs_all(
+                    self.G, idx, query, method=method, aggregate=agg)
+                self.assertEqual(len(scores), 6)
+                for gene, score in zip(idx.genes, scores):
+                    terms = idx.annotation(gene)
+                    if not terms:
+                        self.assertTrue(math.isnan(score))
+                        continue
+                    func = getattr(term_set, f"sim_{agg}")
+                    expected = func(query, terms, sf, digits=None)
+                    self.assertAlmostEqual(score, expected)
+        scores = gene_set.one_vs_all(self.G, idx, [4, 5])
+        genes, ranked = gene_set.rank(idx, scores)
+        self.assertEqual(set(genes), {"A", "B", "C", "D"})  # E: no LCA
+        self.assertTrue((ranked[:-1] >= ranked[1:]).all())
+        self.assertEqual(list(genes[:1]), ["A"])
+        with self.assertRaises(ValueError):
+            gene_set.one_vs_all(self.G, idx, query, aggregate="median")
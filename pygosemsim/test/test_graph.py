@@ -4,11 +4,14 @@
 # http://opensource.org/licenses/MIT
 #
 
+import math
+from pathlib import Path
+import tempfile
 import unittest
 
 import networkx as nx
 
-from pygosemsim import graph
+from pygosemsim import exception, graph, similarity
 
 @unittest.skip("")
 class TestGraph(unittest.TestCase):
@@ -21,3 +24,151 @@ class TestGraph(unittest.TestCase):
         self.G.desc_count["GO:0004340"]
         self.G.desc_count["GO:0004396"]
         self.G.desc_count["GO:0016301"]
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        G = graph.GoGraph()
+        for i in range(8):
+            G.add_node(i, name=f"term{i}", namespace="test",
+                       is_obsolete=False)
+        G.add_edges_from([(0, 1), (0, 2), (1, 3), (2, 4), (3, 5)],
+                         type="is_a")
+        G.add_edges_from([(4, 5), (6, 7)], type="part_of")
+        G.alt_ids[10] = 5
+        self.G = G
+
+    def test_subgraph(self):
+        similarity.precalc_lower_bounds(self.G)
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "test.pickle"
+            graph.to_snapshot(self.G, path)
+            sub = graph.from_snapshot(path, terms=[10])
+            full = graph.from_snapshot(path)
+        self.assertEqual(set(sub), {0, 1, 2, 3, 4, 5})
+        self.assertEqual(sub.nodes[5]["name"], "term5")
+        self.assertEqual(sub.edges[4, 5]["type"], "part_of")
+        self.assertEqual(set(full.edges), set(self.G.edges))
+        self.assertTrue(sub.partial)
+        self.assertFalse(full.partial)
+        # Lower bounds and IC of the whole ontology are kept
+        self.assertEqual(sub.corpus_size, 8)
+        self.assertEqual(similarity.information_content(sub, 4),
+                         similarity.information_content(self.G, 4))
+        self.assertEqual(similarity.lin(sub, 3, 4),
+                         similarity.lin(self.G, 3, 4))
+        with self.assertRaises(exception.PGSSLookupError):
+            similarity.information_content(sub, 7)
+        # Traversal policies also use lower bounds of the whole ontology
+        for policy in ("all", "is_a", "is_a+part_of"):
+            for t1, t2 in [(3, 4), (5, 4), (1, 2)]:
+                self.assertEqual(
+                    similarity.lin(sub, t1, t2, policy=policy),
+                    similarity.lin(self.G, t1, t2, policy=policy))
+                self.assertEqual(
+                    similarity.norm_resnik(sub, t1, t2, policy=policy),
+                    similarity.norm_resnik(self.G, t1, t2, policy=policy))
+        self.assertEqual(similarity.information_content(sub, 1, policy="all"),
+                         similarity.information_content(sub, 1))
+        with self.assertRaises(exception.PGSSInvalidOperation):
+            similarity.information_content(sub, 1, policy=["part_of"])
+        # Subgraph of the subgraph
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "test.pickle"
+            graph.to_snapshot(sub, path)
+            subsub = graph.from_snapshot(path, terms=[3])
+        self.assertEqual(subsub.corpus_size, 8)
+        self.assertEqual(
+            similarity.information_content(subsub, 1, policy="is_a"),
+            similarity.information_content(self.G, 1, policy="is_a"))
+
+    def test_modified(self):
+        # Full graph modified after precalc is not regarded as partial
+        similarity.precalc_lower_bounds(self.G)
+        self.G.add_edge(7, 8, type="is_a")
+        self.assertFalse(self.G.partial)
+        self.assertAlmostEqual(similarity.information_content(
+            self.G, 8, digits=None, policy="all"), math.log2(9))
+        self.assertAlmostEqual(similarity.information_content(
+            self.G, 7, digits=None, policy="is_a"), math.log2(9 / 2))
+        # Terms without lower bounds in the partial graph
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "test.pickle"
+            graph.to_snapshot(self.G, path)
+            sub = graph.from_snapshot(path, terms=[3])
+        sub.add_edge(3, 10, type="is_a")
+        with self.assertRaises(exception.PGSSLookupError):
+            similarity.information_content(sub, 3, policy="is_a")
+
+    def test_extend(self):
+        with tempfile.TemporaryDirectory() as d:
+            path = Path(d) / "test.pickle"
+            graph.to_snapshot(self.G, path)
+            snapshot = graph.load_snapshot(path)
+        G = snapshot.subgraph([3])
+        self.assertEqual(set(G), {0, 1, 3})
+        self.assertIsNone(G.lower_bounds)
+        self.assertAlmostEqual(
+            similarity.information_content(G, 3, digits=None, policy="all"),
+            -math.log2(2 / 8))
+        snapshot.subgraph([4, 7], G)
+        self.assertEqual(set(G), {0, 1, 2, 3, 4, 6, 7})
+        self.assertEqual(G.number_of_edges(), 5)
+        # Cached closure is rebuilt for the added terms
+        self.assertEqual(similarity.resnik(G, 3, 4, policy="all"),
+                         similarity.resnik(self.G, 3, 4, policy="all"))
+        with self.assertRaises(exception.PGSSLookupError):
+            snapshot.subgraph([9])
+
+
+class TestCompact(unittest.TestCase):
+    def test_compact(self):
+        lines = """format-version: 1.2
+
+[Term]
+id: GO:0000001
+name: root
+namespace: biological_process
+
+[Term]
+id: GO:0000002
+name: child
+namespace: biological_process
+is_a: GO:0000001 ! root
+
+[Term]
+id: GO:0000003
+name: part
+namespace: cellular_component
+is_a: GO:0000001 ! root
+relationship: part_of GO:0000002 ! child
+
+[Term]
+id: GO:0000004
+name: duplicate
+namespace: cellular_component
+is_a: GO:0000002 ! child
+relationship: part_of GO:0000002 ! child
+""".splitlines()
+        G = graph.from_obo_lines(lines)
+        Gc = graph.from_obo_lines(lines, compact=True)
+        self.assertEqual(set(G.edges(data="type")), set(Gc.edges(data="type")))
+        self.assertEqual(Gc.nodes["GO:0000003"], {})
+        self.assertEqual(Gc.terms["GO:0000003"].name, "part")
+        self.assertEqual(Gc.terms.namespaces,
+                         ["biological_process", "cellular_component"])
+        for n in G:
+            self.assertEqual(Gc.term_attr(n), G.term_attr(n))
+        self.assertIs(Gc.edges["GO:0000001", "GO:0000002"]["type"],
+                      Gc.edges["GO:0000001", "GO:0000003"]["type"])
+        # Duplicated relations are resolved in the same way (the last one)
+        self.assertEqual(Gc.edges["GO:0000002", "GO:0000004"]["type"],
+                         G.edges["GO:0000002", "GO:0000004"]["type"])
+        similarity.precalc_lower_bounds(G)
+        similarity.precalc_lower_bounds(Gc)
+        self.assertEqual(
+            similarity.wang(G, "GO:0000002", "GO:0000003"),
+            similarity.wang(Gc, "GO:0000002", "GO:0000003"))
+        # Edge attributes are independent
+        Gc.add_edge("GO:0000001", "GO:0000002", type="part_of")
+        self.assertEqual(Gc.edges["GO:0000001", "GO:0000003"]["type"], "is_a")
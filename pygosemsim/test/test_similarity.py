@@ -4,12 +4,26 @@
 # http://opensource.org/licenses/MIT
 #
 
+import functools
+import itertools
+import math
+import subprocess
+import sys
 import unittest
 
-from pygosemsim import exception, graph, similarity
+import numpy as np
+
+from pygosemsim import exception, graph, similarity, term_set
 
 
 class TestSimilarity(unittest.TestCase):
+    def test_lazy_import(self):
+        code = ("import sys; import pygosemsim.similarity; "
+                "print('networkx' in sys.modules)")
+        res = subprocess.run([sys.executable, "-c", code],
+                             stdout=subprocess.PIPE, check=True)
+        self.assertEqual(res.stdout.strip(), b"False")
+
     def test_lca(self):
         G = graph.GoGraph()
         G.add_nodes_from(range(15))
@@ -64,6 +78,61 @@ class TestSimilarity(unittest.TestCase):
         self.assertEqual(similarity.pekar(G, 0, 0), None)
         self.assertEqual(similarity.lin(G, 0, 0), None)  # Zero division
 
+    def test_unrounded(self):
+        G = graph.GoGraph()
+        G.add_nodes_from(range(6))
+        G.add_edges_from([(0, 1), (0, 2), (1, 3), (2, 3), (1, 4), (2, 5)],
+                         type="is_a")
+        similarity.precalc_lower_bounds(G)
+        ic1 = math.log2(6 / 3)
+        self.assertEqual(similarity.information_content(G, 1), 1)
+        self.assertEqual(
+            similarity.information_content(G, 3, digits=None),
+            math.log2(6))
+        self.assertEqual(similarity.resnik(G, 3, 4, digits=None), ic1)
+        self.assertEqual(similarity.lin(G, 3, 4), 0.387)
+        self.assertEqual(similarity.lin(G, 3, 4, digits=None),
+                         2 * ic1 / (2 * math.log2(6)))
+        self.assertEqual(similarity.norm_resnik(G, 3, 4, digits=None),
+                         ic1 / math.log2(6))
+        self.assertEqual(similarity.wang(G, 3, 5), 0.507)
+        sv = similarity.s_values(G, 3, digits=None)
+        self.assertAlmostEqual(sv[0], 0.64)
+        # Batch
+        terms = [0, 1, 2, 3, 4, 5, 9]  # 9: missing term
+        for method in ("resnik", "norm_resnik", "lin", "wang", "pekar"):
+            func = getattr(similarity, method)
+            res = similarity.pairwise(G, func, terms, terms)
+            self.assertEqual(res.dtype, np.float64)
+            for (i, t1), (j, t2) in itertools.product(enumerate(terms),
+                                                      repeat=2):
+                try:
+                    sim = func(G, t1, t2, digits=None)
+                except exception.PGSSLookupError:
+                    sim = None
+                if sim is None:
+                    self.assertTrue(np.isnan(res[i, j]))
+                else:
+                    self.assertAlmostEqual(res[i, j], sim)
+        res = similarity.pairwise(G, similarity.wang, [3], [5], digits=3)
+        self.assertEqual(res[0, 0], 0.507)
+        res = similarity.pairwise(G, similarity.lin, [3], [4], policy="is_a")
+        self.assertAlmostEqual(res[0, 0], similarity.lin(G, 3, 4, None))
+
+        def edge_sim(G, term1, term2):
+            # Custom method without digits param
+            return 1 if G.has_edge(term1, term2) else None
+        res = similarity.pairwise(G, edge_sim, [0, 1], [1, 2])
+        self.assertEqual(res[0, 0], 1)
+        self.assertTrue(np.isnan(res[1, 1]))
+        # Term set
+        sf = functools.partial(term_set.sim_func, G, similarity.lin,
+                               digits=None)
+        self.assertEqual(term_set.sim_max([3], [4, 1], sf, digits=None),
+                         similarity.lin(G, 3, 1, digits=None))
+        sf = functools.partial(term_set.sim_func, G, similarity.lin)
+        self.assertEqual(term_set.sim_bma([3], [4, 1], sf), 0.501)
+
 
 
 
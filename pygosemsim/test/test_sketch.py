@@ -0,0 +1,80 @@
+#
+# (C) 2014-2017 Seiji Matsuoka
+# Licensed under the MIT License (MIT)
+# http://opensource.org/licenses/MIT
+#
+
+import random
+import unittest
+
+import numpy as np
+
+from pygosemsim import gene_set, sketch
+
+
+def random_index(size, terms, seed=0):
+    """AnnotationIndex of random closures including some duplicates"""
+    rnd = random.Random(seed)
+    rows = []
+    for i in range(size):
+        if i % 10 == 1:
+            rows.append(rows[-1])  # Identical closure
+        elif i % 10 == 2:
+            rows.append(sorted(set(rows[-2][:-2]) | {0}))  # Similar one
+        else:
+            rows.append(sorted(rnd.sample(range(terms), 30)))
+    rows.append([])  # Empty
+    indptr = np.cumsum([0] + [len(r) for r in rows])
+    indices = np.array([c for r in rows for c in r], dtype=np.int64)
+    genes = [f"G{i}" for i in range(len(rows))]
+    return gene_set.AnnotationIndex(
+        genes, list(range(terms)), indptr, indices, indptr, indices)
+
+
+class TestSketch(unittest.TestCase):
+    def test_params(self):
+        self.assertEqual(sketch.num_perm_for(0.1), 185)
+        self.assertLessEqual(sketch.error_bound(185), 0.1)
+        bands, rows = sketch.lsh_params(128, 0.5)
+        self.assertLessEqual(bands * rows, 128)
+        self.assertLessEqual((1 / bands) ** (1 / rows), 0.5)
+
+    def test_minhash(self):
+        idx = random_index(200, 100)
+        mh = sketch.minhash(idx, error=0.1, chunk_size=1000)
+        self.assertEqual(mh.signatures.shape, (201, 185))
+        exact = gene_set.sim_ui(idx)
+        est = mh.pairwise()
+        self.assertTrue(np.array_equal(
+            mh.pairwise(chunk_size=1), est, equal_nan=True))
+        valid = ~np.isnan(exact)
+        self.assertTrue((np.isnan(est) == np.isnan(exact)).all())
+        # Error bound holds with probability 0.95
+        err = np.abs(est - exact)[valid]
+        self.assertGreater((err <= mh.error).mean(), 0.95)
+        self.assertEqual(mh.jaccard("G0", "G1"), 1)
+        self.assertAlmostEqual(mh.jaccard("G2", "G3"), est[2, 3])
+        self.assertEqual(mh.jaccard("G0", "G200"), 0)
+        self.assertIsNone(mh.jaccard("G200", "G200"))
+        # Deterministic
+        mh2 = sketch.minhash(idx, num_perm=185)
+        self.assertTrue((mh.signatures == mh2.signatures).all())
+
+    def test_candidates(self):
+        idx = random_index(200, 500)
+        mh = sketch.minhash(idx, error=0.1)
+        res = sketch.candidates(mh, threshold=0.8)
+        found = {(g1, g2) for g1, g2, _ in res}
+        exact = gene_set.sim_ui(idx)
+        expected = {
+            (idx.genes[i], idx.genes[j])
+            for i, j in zip(*np.nonzero(np.triu(exact >= 0.8, k=1)))}
+        self.assertEqual(len(expected), 60)
+        self.assertTrue(expected <= found)
+        estimates = [e for _, _, e in res]
+        self.assertEqual(estimates, sorted(estimates, reverse=True))
+        self.assertTrue(all(e >= 0.8 for e in estimates))
+        for g1, g2, e in res:
+            i, j = idx.gene_index[g1], idx.gene_index[g2]
+            self.assertLessEqual(abs(exact[i, j] - e), mh.error)
+        self.assertEqual(sketch.candidates(mh, threshold=1.1), [])
@@ -47,6 +47,11 @@ def total_size(obj, verbose=False):
             s += sum(map(sizeof, chain.from_iterable(o.items())))
         elif "__dict__" in dir(o):
             s += sum(map(sizeof, chain.from_iterable(o.__dict__.items())))
+        for c in type(o).__mro__:
+            slots = getattr(c, "__slots__", ())
+            if isinstance(slots, str):
+                slots = (slots,)
+            s += sum(sizeof(getattr(o, k)) for k in slots if hasattr(o, k))
         return s
 
     return sizeof(obj)